@@ -1,14 +1,95 @@
 from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db.models import DateTimeField, F, Q, Value
+from django.db.models.functions import Coalesce, Least
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from .models import Article, AuthorStats, Profile
+from .paginators import EstimatedCountPaginator
+from .signals import article_published
+
+class ScheduledFilter(admin.SimpleListFilter):
+    title = 'scheduled'
+    parameter_name = 'scheduled'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Scheduled'), ('no', 'Not scheduled'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(scheduled=True)
+        if self.value() == 'no':
+            return queryset.filter(scheduled=False)
 
-from .models import Article, Profile
 
 @admin.register(Article)
 class ArticleAdmin(admin.ModelAdmin):
-    list_display = ['title', 'publish', 'created', 'author']
-    list_filter = ('author', 'title',)
+    list_display = ['title', 'publish', 'pub_date', 'created', 'author_link']
+    list_filter = ('publish', ScheduledFilter)
     list_editable = ('publish',)
+    list_select_related = ('author',)
+    raw_id_fields = ('author',)
+    # matched by `get_search_results`
+    search_fields = ('title', 'slug', 'author__username')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['publish_articles', 'unpublish_articles']
+
+    def author_link(self, article):
+        # filter by author through the changelist query string instead of a
+        # sidebar listing every user
+        url = reverse('admin:blog_article_changelist')
+        return format_html('<a href="{}?author={}">{}</a>', url, article.author_id, article.author.username)
+    author_link.short_description = 'author'
+    author_link.admin_order_field = 'author__username'
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Articles whose title starts with the search term, ignoring case, or
+        whose slug or author's username is the search term. The title is
+        compared through its lowercased copy, so every match is a lookup or
+        range scan of an index; Django's `^` and `=` searches compare with
+        UPPER() or LIKE, which scan the table.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        lowered = term.lower()
+        matches = (
+            Q(title_search__gte=lowered, title_search__lt=lowered + '\U0010ffff')
+            | Q(slug=lowered)
+            | Q(author__in=User.objects.filter(username__in={term, lowered}).values('pk'))
+        )
+        return queryset.filter(matches), False
+
+    def publish_articles(self, request, queryset):
+        # publish right away: keep an earlier pub_date, replace a missing or
+        # scheduled one with now
+        now = timezone.now()
+        now_value = Value(now, output_field=DateTimeField())
+        pks = list(queryset.filter(publish=False).values_list('pk', flat=True))
+        count = Article.objects.filter(pk__in=pks).update(
+            publish=True,
+            scheduled=False,
+            pub_date=Least(Coalesce(F('pub_date'), now_value), now_value),
+            updated=now,
+        )
+        if pks:
+            article_published.send(sender=Article, articles=list(Article.objects.filter(pk__in=pks)))
+        self.message_user(request, f'{count} article(s) published.')
+    publish_articles.short_description = 'Publish selected articles'
+
+    def unpublish_articles(self, request, queryset):
+        authors = set(queryset.filter(publish=True).values_list('author_id', flat=True))
+        count = queryset.filter(publish=True).update(publish=False, pub_date=None, updated=timezone.now())
+        AuthorStats.objects.refresh(authors)
+        self.message_user(request, f'{count} article(s) unpublished.')
+    unpublish_articles.short_description = 'Unpublish selected articles'
 
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    list_display = ['full_name', 'user', 'github', 'website']
\ No newline at end of file
+    list_display = ['full_name', 'user', 'github', 'website']
+    list_select_related = ('user',)
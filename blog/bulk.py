@@ -0,0 +1,278 @@
+"""
+Streaming import and export of articles, users and votes.
+
+Records are read and written one at a time (JSON lines or CSV), and
+imports are written with `bulk_create` in batches, one transaction per
+batch, so memory use depends on the batch size rather than on the size
+of the file.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.template.defaultfilters import slugify
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Article, AuthorStats, Profile, Like, Dislike, PendingVote, chunks
+
+FORMATS = ('jsonl', 'csv')
+KINDS = ('articles', 'users', 'votes')
+
+ARTICLE_FIELDS = ['title', 'slug', 'author', 'content', 'publish', 'pub_date']
+USER_FIELDS = [
+    'username', 'email', 'password', 'first_name', 'last_name', 'is_active', 'date_joined',
+    'full_name', 'bio', 'github', 'twitter', 'website', 'facebook',
+]
+PROFILE_FIELDS = ['full_name', 'bio', 'github', 'twitter', 'website', 'facebook']
+VOTE_FIELDS = ['kind', 'user', 'article']
+VOTE_MODELS = {'like': Like, 'dislike': Dislike}
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+
+    def __str__(self):
+        return f'{self.created} created, {self.skipped} skipped'
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_records(stream, fmt):
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def write_records(stream, fmt, fieldnames, records):
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=fieldnames)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+        return count
+    for record in records:
+        stream.write(json.dumps(record, default=str) + '\n')
+        count += 1
+    return count
+
+
+def to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y', 't')
+    return bool(value)
+
+
+def to_datetime(value):
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def values_in(queryset, field, values, *fields, flat=False):
+    """
+    `values_list(*fields)` of the rows whose `field` is one of `values`, a
+    query per chunk of them, as a batch can have more values than SQLite
+    allows parameters.
+    """
+    values = list(set(values))
+    return [
+        row for chunk in chunks(values)
+        for row in queryset.filter(**{f'{field}__in': chunk}).values_list(*fields, flat=flat)
+    ]
+
+
+def user_ids(usernames):
+    return dict(values_in(User.objects, 'username', usernames, 'username', 'pk'))
+
+
+def import_articles(records, batch_size=1000):
+    result = ImportResult()
+    now = timezone.now()
+    imported_authors = set()
+    for batch in chunked(records, batch_size):
+        authors = user_ids(r.get('author') for r in batch)
+        titles = {r.get('title') for r in batch}
+        seen = set(values_in(Article.objects, 'title', titles, 'title', flat=True))
+        slugs = {r.get('slug') or slugify(r.get('title') or '') for r in batch}
+        taken = set(values_in(Article.objects, 'slug', slugs, 'slug', flat=True))
+        articles = []
+        for record in batch:
+            title = record.get('title')
+            author_id = authors.get(record.get('author'))
+            if not title or author_id is None or title in seen:
+                result.skipped += 1
+                continue
+            seen.add(title)
+            slug = record.get('slug') or slugify(title)
+            if slug in taken:
+                # only colliding slugs cost a query of their own
+                slug = Article.unique_slug(title, reserved=taken)
+            taken.add(slug)
+            publish = to_bool(record.get('publish'))
+            pub_date = to_datetime(record.get('pub_date'))
+            # `bulk_create` bypasses `Article.save()`, so apply its rules here
+            scheduled = bool(pub_date and pub_date > now)
+            if scheduled:
+                publish = False
+            elif publish:
+                pub_date = pub_date or now
+            else:
+                pub_date = None
+            articles.append(Article(
+                title=title,
+                title_search=title.lower(),
+                slug=slug,
+                author_id=author_id,
+                content=record.get('content') or '',
+                publish=publish,
+                scheduled=scheduled,
+                pub_date=pub_date,
+            ))
+        for article in articles:
+            article.render_content()
+        with transaction.atomic():
+            Article.objects.bulk_create(articles)
+        imported_authors.update(article.author_id for article in articles)
+        result.created += len(articles)
+    # `bulk_create` doesn't send the signal that updates the authors' stats,
+    # refresh them once for the whole import rather than after every batch
+    AuthorStats.objects.refresh(imported_authors)
+    return result
+
+
+def import_users(records, batch_size=1000):
+    result = ImportResult()
+    for batch in chunked(records, batch_size):
+        usernames = {r.get('username') for r in batch}
+        seen = set(values_in(User.objects, 'username', usernames, 'username', flat=True))
+        users = []
+        profile_fields = {}
+        for record in batch:
+            username = record.get('username')
+            if not username or username in seen:
+                result.skipped += 1
+                continue
+            seen.add(username)
+            user = User(
+                username=username,
+                email=record.get('email') or '',
+                first_name=record.get('first_name') or '',
+                last_name=record.get('last_name') or '',
+                is_active=to_bool(record.get('is_active', True)),
+                date_joined=to_datetime(record.get('date_joined')) or timezone.now(),
+            )
+            # passwords are imported already hashed
+            if record.get('password'):
+                user.password = record['password']
+            else:
+                user.set_unusable_password()
+            users.append(user)
+            profile_fields[username] = {
+                field: record[field] for field in PROFILE_FIELDS if record.get(field)
+            }
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            # not every backend returns primary keys from `bulk_create`
+            users = [
+                user for chunk in chunks(list(profile_fields))
+                for user in User.objects.filter(username__in=chunk).only('pk', 'username', 'email')
+            ]
+            Profile.objects.create_for_users(
+                users,
+                profile_fields={user.pk: profile_fields[user.username] for user in users},
+            )
+        result.created += len(users)
+    return result
+
+
+def import_votes(records, batch_size=1000):
+    result = ImportResult()
+    for batch in chunked(records, batch_size):
+        users = user_ids(r.get('user') for r in batch)
+        articles = dict(values_in(Article.objects, 'slug', (r.get('article') for r in batch), 'slug', 'pk'))
+        votes = {kind: [] for kind in VOTE_MODELS}
+        for kind, model in VOTE_MODELS.items():
+            pairs = [
+                (users.get(r.get('user')), articles.get(r.get('article')))
+                for r in batch if r.get('kind') == kind
+            ]
+            pairs = [(user_id, article_id) for user_id, article_id in pairs if user_id and article_id]
+            # the votes of these users, a query per chunk of articles
+            seen = set()
+            for chunk in chunks(sorted({article_id for _, article_id in pairs}), 250):
+                seen.update(values_in(
+                    model.objects.filter(article_id__in=chunk), 'user_id',
+                    {user_id for user_id, article_id in pairs if article_id in chunk},
+                    'user_id', 'article_id',
+                ))
+            for pair in pairs:
+                if pair not in seen:
+                    seen.add(pair)
+                    votes[kind].append(model(user_id=pair[0], article_id=pair[1]))
+        # `bulk_create` doesn't send the signal that logs each vote
+        pending = [
+            PendingVote(article_id=vote.article_id, created=vote.created, **{f'{kind}s': 1})
+            for kind, objs in votes.items() for vote in objs
+        ]
+        with transaction.atomic():
+            for kind, model in VOTE_MODELS.items():
+                model.objects.bulk_create(votes[kind])
+            PendingVote.objects.bulk_create(pending)
+        created = sum(len(objs) for objs in votes.values())
+        result.created += created
+        result.skipped += len(batch) - created
+    return result
+
+
+def export_articles(batch_size=1000):
+    rows = Article.objects.order_by('pk').values(
+        'title', 'slug', 'author__username', 'content', 'publish', 'pub_date',
+    )
+    for row in rows.iterator(chunk_size=batch_size):
+        row['author'] = row.pop('author__username')
+        yield row
+
+
+def export_users(batch_size=1000):
+    rows = User.objects.order_by('pk').values(
+        'username', 'email', 'password', 'first_name', 'last_name', 'is_active', 'date_joined',
+        *(f'profile__{field}' for field in PROFILE_FIELDS)
+    )
+    for row in rows.iterator(chunk_size=batch_size):
+        for field in PROFILE_FIELDS:
+            row[field] = row.pop(f'profile__{field}')
+        yield row
+
+
+def export_votes(batch_size=1000):
+    for kind, model in VOTE_MODELS.items():
+        rows = model.objects.order_by('pk').values_list('user__username', 'article__slug')
+        for username, slug in rows.iterator(chunk_size=batch_size):
+            yield {'kind': kind, 'user': username, 'article': slug}
+
+
+IMPORTERS = {'articles': import_articles, 'users': import_users, 'votes': import_votes}
+EXPORTERS = {'articles': export_articles, 'users': export_users, 'votes': export_votes}
+FIELDNAMES = {'articles': ARTICLE_FIELDS, 'users': USER_FIELDS, 'votes': VOTE_FIELDS}
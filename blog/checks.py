@@ -0,0 +1,73 @@
+"""
+System checks flagging settings that hurt performance in production. They
+run with management commands such as `check`, `runserver` and `migrate`,
+and when `blogger.wsgi` starts.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+def uses_cached_loader(options):
+    for loader in options.get('loaders') or []:
+        if isinstance(loader, (list, tuple)):
+            loader = loader[0]
+        if loader == 'django.template.loaders.cached.Loader':
+            return True
+    return False
+
+
+@register('performance')
+def check_performance_settings(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    errors = []
+    for engine in settings.TEMPLATES:
+        options = engine.get('OPTIONS', {})
+        if (engine['BACKEND'] == 'django.template.backends.django.DjangoTemplates'
+                and (options.get('debug') or options.get('loaders') and not uses_cached_loader(options))):
+            errors.append(Warning(
+                'Templates are compiled again on every render.',
+                hint="Use 'django.template.loaders.cached.Loader' and leave template debugging off.",
+                id='blog.W001',
+            ))
+    if settings.SESSION_ENGINE in ('django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.file'):
+        errors.append(Warning(
+            'Sessions are read from storage on every request.',
+            hint="Use the 'cache' or 'cached_db' session engine.",
+            id='blog.W002',
+        ))
+    for alias, database in settings.DATABASES.items():
+        if not database.get('CONN_MAX_AGE'):
+            errors.append(Warning(
+                f"Database '{alias}' opens a new connection for every request.",
+                hint='Set CONN_MAX_AGE to keep connections open.',
+                id='blog.W003',
+            ))
+    backend = settings.CACHES['default']['BACKEND']
+    if backend == 'django.core.cache.backends.dummy.DummyCache':
+        errors.append(Warning('The default cache stores nothing.', id='blog.W004'))
+    elif backend == 'django.core.cache.backends.locmem.LocMemCache':
+        errors.append(Warning(
+            'The default cache is private to each worker process.',
+            hint='Cached sessions, users and rate limits are not shared between workers; '
+                 'configure a shared cache such as memcached.',
+            id='blog.W005',
+        ))
+    if 'django.middleware.gzip.GZipMiddleware' not in settings.MIDDLEWARE:
+        errors.append(Warning(
+            'Responses are sent uncompressed.',
+            hint="Add 'django.middleware.gzip.GZipMiddleware' to MIDDLEWARE.",
+            id='blog.W006',
+        ))
+    return errors
+
+
+@register('performance', deploy=True)
+def check_debug(app_configs, **kwargs):
+    if settings.DEBUG:
+        return [Warning(
+            'DEBUG is on, every SQL query of a request is kept in memory.',
+            hint='Use blogger.settings.prod in production.',
+            id='blog.W007',
+        )]
+    return []
@@ -0,0 +1,108 @@
+"""
+Write-behind article view counts.
+
+Detail pages count views in the memory of the worker process instead of
+updating the article row on every request, the busiest read path. The
+counts are written at most every `BLOG_VIEW_FLUSH_INTERVAL` seconds, in
+one transaction with one UPDATE per distinct count, like the vote log.
+A view due for writing is written by the next view, or by a timer when
+the worker gets no more of them, so a worker that exits loses at most the
+views of one interval.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+from .models import Article, chunks
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = Counter()
+_last_flush = time.monotonic()
+# armed while views are buffered, see `flush_later`
+_timer = None
+
+
+def flush_interval():
+    return getattr(settings, 'BLOG_VIEW_FLUSH_INTERVAL', 10)
+
+
+def count_view(article_id, now=None):
+    """
+    Count a view of the article, flushing the counts when they are due.
+    """
+    now = time.monotonic() if now is None else now
+    with _lock:
+        _pending[article_id] += 1
+        due = now - _last_flush >= flush_interval()
+        if not due:
+            start_timer()
+    if due:
+        flush_views(now)
+
+
+def start_timer():
+    # called holding `_lock`
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(flush_interval(), flush_later)
+        _timer.daemon = True
+        _timer.start()
+
+
+def pending_views(article_id):
+    return _pending.get(article_id, 0)
+
+
+def flush_views(now=None):
+    """
+    Add the buffered views to the articles. Returns the number of views
+    written.
+    """
+    global _last_flush, _timer
+    with _lock:
+        views = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic() if now is None else now
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not views:
+        return 0
+    by_count = {}
+    for article_id, count in views.items():
+        by_count.setdefault(count, []).append(article_id)
+    try:
+        with transaction.atomic():
+            for count, article_ids in by_count.items():
+                for chunk in chunks(sorted(article_ids)):
+                    Article.objects.filter(pk__in=chunk).update(views=F('views') + count)
+    except DatabaseError:
+        # keep them for the next flush
+        with _lock:
+            _pending.update(views)
+        raise
+    return sum(views.values())
+
+
+def flush_later():
+    """
+    Flush the views of a worker that stopped getting views, run on a timer
+    `BLOG_VIEW_FLUSH_INTERVAL` seconds after the first buffered view.
+    """
+    try:
+        flush_views()
+    except DatabaseError:
+        logger.exception('Writing the buffered article views failed')
+        with _lock:
+            start_timer()
+    finally:
+        # the timer's thread opened a connection of its own
+        connection.close()
+
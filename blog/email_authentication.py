@@ -1,18 +1,53 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+
+# cached users expire on their own even if an invalidation is missed
+USER_CACHE_TIMEOUT = getattr(settings, 'USER_CACHE_TIMEOUT', 60 * 5)
+
+
+def user_cache_key(user_id):
+    return f'blog:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def normalize_login_email(email):
+    email = (email or '').strip().lower()
+    return email or None
+
 
 class EmailAuthBackend(object):
     # authenticate using e-mail account
     def authenticate(self,request, username=None, password=None):
+        # `Profile.login_email` holds the normalized, uniquely indexed
+        # address, so this is an index lookup that can't match two users
+        email = normalize_login_email(username)
         try:
-            user = User.objects.get(email=username)  # use email in place of username
-            if user.check_password(password):
-                return user
-            return None
+            if email is None:
+                raise User.DoesNotExist
+            user = User.objects.get(profile__login_email=email)
         except User.DoesNotExist:
+            # hash anyway so a missing account takes as long as a bad password
+            User().set_password(password)
             return None
-        
+        if user.check_password(password):
+            return user
+        return None
+
     def get_user(self, user_id):
+        # called on every authenticated request, so the user (and the profile
+        # every page renders) is served from the cache until the user or
+        # profile is saved again, see `blog.signals`
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is not None:
+            return user
         try:
-            return User.objects.get(pk=user_id)
+            user = User.objects.select_related('profile').get(pk=user_id)
         except User.DoesNotExist:
-            return None
\ No newline at end of file
+            return None
+        cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,11 @@
+from ckeditor.widgets import CKEditorWidget
+from django import forms
+
+from .models import Article
+
+
+class ArticleForm(forms.ModelForm):
+    class Meta:
+        model = Article
+        fields = ['title', 'content', 'publish', 'pub_date']
+        widgets = {'content': CKEditorWidget()}
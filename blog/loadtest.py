@@ -0,0 +1,310 @@
+"""
+Load testing against a local stand-in of the production stack.
+
+`manage.py loadtest` seeds a throwaway SQLite database, serves the WSGI
+application from a pre-forked pool of worker processes sharing one
+listening socket, and replays a weighted mix of traffic from client
+threads. Everything runs on the local machine and is driven by one random
+seed, so the same options replay the same requests.
+
+Scenarios return the requests they make as `(label, path, cookie)`, sent
+one after the other, except for those in `CONCURRENT`: a vote burst is
+several users voting on one hot article at once, so its requests are sent
+from as many threads, released together.
+"""
+import http.client
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+from importlib import import_module
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.db import connections
+from django.utils import timezone
+
+from . import bulk
+from .models import Article, PendingVote
+
+WORDS = """
+    python django cache query index server worker thread process memory latency request
+    response template database migration session cookie static deploy release feature
+    garden travel coffee music science history kitchen running camera winter summer ocean
+    mountain river forest city market design pattern testing review writing reading
+""".split()
+
+DEFAULT_MIX = 'list=35,detail=35,dashboard=10,vote=10,search=10'
+VOTE_BURST = 5
+
+
+def parse_mix(mix):
+    """
+    'list=3,detail=1' -> {'list': 3, 'detail': 1}.
+    """
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}', choose from {', '.join(SCENARIOS)}.")
+        try:
+            weights[name] = int(weight)
+        except ValueError:
+            raise ValueError(f"Scenario weights are whole numbers, got '{part}'.")
+        if weights[name] < 0:
+            raise ValueError(f"Scenario weights can't be negative, got '{part}'.")
+    if not any(weights.values()):
+        raise ValueError('At least one scenario needs a positive weight.')
+    return weights
+
+
+def percentile(values, p):
+    """
+    The nearest-rank `p`th percentile of sorted `values`.
+    """
+    if not values:
+        return 0
+    rank = max(int(-(-p * len(values) // 100)), 1)
+    return values[rank - 1]
+
+
+def hot(rng, items):
+    # a few items get most of the traffic, as on a real site
+    return items[min(int(rng.expovariate(10 / len(items))), len(items) - 1)]
+
+
+def session_cookie(fixture, rng):
+    return f"{fixture['cookie_name']}={rng.choice(fixture['sessions'])}"
+
+
+def article_list(rng, fixture):
+    page = rng.randint(1, fixture['pages'])
+    return [('list', '/' if page == 1 else f'/?page={page}', None)]
+
+
+def article_detail(rng, fixture):
+    return [('detail', f"/article/{hot(rng, fixture['slugs'])}/", None)]
+
+
+def dashboard(rng, fixture):
+    return [('dashboard', '/dashboard/', session_cookie(fixture, rng))]
+
+
+def vote_burst(rng, fixture):
+    slug = hot(rng, fixture['slugs'])
+    kind = rng.choice(['like', 'like', 'like', 'dislike'])
+    return [('vote', f'/article/{slug}/{kind}/', session_cookie(fixture, rng)) for _ in range(VOTE_BURST)]
+
+
+def search(rng, fixture):
+    query = '+'.join(rng.sample(fixture['words'], rng.randint(1, 2)))
+    return [('search', f'/?query={query}', None)]
+
+
+SCENARIOS = {
+    'list': article_list,
+    'detail': article_detail,
+    'dashboard': dashboard,
+    'vote': vote_burst,
+    'search': search,
+}
+# scenarios whose requests are all in flight at the same time
+CONCURRENT = {'vote'}
+
+
+def title(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(4)).capitalize()
+
+
+def paragraph(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))).capitalize() + '.'
+
+
+def seed(users=50, articles=500, votes=2000, seed=0):
+    """
+    Fill the (empty, migrated) database with users, articles and votes, log
+    every user in, and return what the clients need to know about them.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    usernames = [f'loaduser{i}' for i in range(users)]
+    bulk.import_users({'username': name, 'email': f'{name}@example.com'} for name in usernames)
+    titles = [f'{title(rng)} {i}' for i in range(articles)]
+    bulk.import_articles({
+        'title': article_title,
+        'author': rng.choice(usernames),
+        'content': '\n\n'.join(paragraph(rng) for _ in range(rng.randint(3, 12))),
+        'publish': True,
+        'pub_date': now - timedelta(minutes=rng.randint(1, 60 * 24 * 30)),
+    } for article_title in titles)
+    slugs = dict(Article.objects.values_list('title', 'slug'))
+    slugs = [slugs[article_title] for article_title in titles]
+    bulk.import_votes({
+        'kind': rng.choice(['like', 'like', 'like', 'dislike']),
+        'user': rng.choice(usernames),
+        'article': hot(rng, slugs),
+    } for _ in range(votes))
+    PendingVote.objects.apply()
+
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+    sessions = []
+    for user in User.objects.filter(username__in=usernames).order_by('pk'):
+        session = SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        sessions.append(session.session_key)
+    return {
+        'slugs': slugs,
+        'sessions': sessions,
+        'cookie_name': settings.SESSION_COOKIE_NAME,
+        'words': sorted(WORDS),
+        # the list view shows 5 articles a page, only the first few get read
+        'pages': min(max(articles // 5, 1), 20),
+    }
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        # the clients time every request, a log line each only slows workers down
+        pass
+
+
+class PreforkServer(WSGIServer):
+    # room for every client's connection while the workers are busy
+    request_queue_size = 128
+
+
+def serve(application, workers, host='127.0.0.1', port=0):
+    """
+    Serve `application` from `workers` forked processes accepting on one
+    socket, like a pre-forking production server. Prints the port, then
+    runs until the workers are killed.
+    """
+    server = PreforkServer((host, port), QuietHandler)
+    server.set_app(application)
+    # connections must not be shared across processes, each worker opens its own
+    connections.close_all()
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+    print(server.server_port, flush=True)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+def fetch(port, path, cookie=None, timeout=30):
+    """
+    GET `path`, returning the status (0 when the request failed) and the
+    seconds it took.
+    """
+    headers = {'Cookie': cookie} if cookie else {}
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    start = time.perf_counter()
+    try:
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        status = response.status
+    except (OSError, http.client.HTTPException):
+        status = 0
+    finally:
+        connection.close()
+    return status, time.perf_counter() - start
+
+
+def fetch_together(port, requests):
+    """
+    Send `requests` at the same time, each from a thread of its own that a
+    barrier holds until all of them are ready. Returns their
+    `(label, status, seconds)`.
+    """
+    barrier = threading.Barrier(len(requests))
+    results = [None] * len(requests)
+
+    def send(index, label, path, cookie):
+        barrier.wait()
+        results[index] = (label, *fetch(port, path, cookie))
+
+    threads = [threading.Thread(target=send, args=(index, *request)) for index, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def replay(port, fixture, mix, runs, clients, seed=0):
+    """
+    Run `runs` scenarios picked by the weights of `mix`, spread over
+    `clients` concurrent threads. Returns the `(label, status, seconds)` of
+    every request, and the seconds the whole run took.
+    """
+    names, weights = zip(*mix.items())
+    samples = []
+    lock = threading.Lock()
+
+    def client(index, count):
+        rng = random.Random(f'{seed}:{index}')
+        results = []
+        for _ in range(count):
+            name = rng.choices(names, weights)[0]
+            requests = SCENARIOS[name](rng, fixture)
+            if name in CONCURRENT:
+                results.extend(fetch_together(port, requests))
+                continue
+            for label, path, cookie in requests:
+                results.append((label, *fetch(port, path, cookie)))
+        with lock:
+            samples.extend(results)
+
+    threads = [
+        threading.Thread(target=client, args=(index, runs // clients + (index < runs % clients)))
+        for index in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def is_error(status):
+    # 429s are the rate limits doing their job, counted on their own
+    return status == 0 or (status >= 400 and status != 429)
+
+
+def summarize(samples):
+    """
+    Requests, errors, throttled requests and p50/p95/p99 latency (in ms) per
+    scenario label, and over all of them as 'total'.
+    """
+    groups = {}
+    for label, status, seconds in samples:
+        groups.setdefault(label, []).append((status, seconds))
+    groups = {label: groups[label] for label in SCENARIOS if label in groups}
+    groups['total'] = [(status, seconds) for _, status, seconds in samples]
+    summary = {}
+    for label, results in groups.items():
+        latencies = sorted(seconds * 1000 for _, seconds in results)
+        summary[label] = {
+            'requests': len(results),
+            'errors': sum(1 for status, _ in results if is_error(status)),
+            'throttled': sum(1 for status, _ in results if status == 429),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+        }
+    return summary
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.models import PendingVote
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply the logged votes to the article like and dislike counters. Run it '
+        'from cron, or keep it running with --watch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Votes applied per transaction.')
+        parser.add_argument('--watch', action='store_true', help='Keep running, applying votes periodically.')
+        parser.add_argument('--interval', type=float, default=5, help='With --watch, seconds between runs.')
+
+    def handle(self, **options):
+        while True:
+            applied = PendingVote.objects.apply(batch_size=options['batch_size'])
+            if applied or not options['watch']:
+                self.stdout.write(f'Applied {applied} vote(s).')
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,75 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter, so nothing is already imported or cached.
+STARTUP_SCRIPT = """
+import json, time
+from django.db import connections
+
+queries = []
+
+def record(execute, sql, params, many, context):
+    queries.append(sql)
+    return execute(sql, params, many, context)
+
+# keep the context managers referenced, or their exit runs on collection
+wrappers = [connections[alias].execute_wrapper(record) for alias in connections]
+for wrapper in wrappers:
+    wrapper.__enter__()
+
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - start
+setup_queries = len(queries)
+
+start = time.perf_counter()
+from importlib import import_module
+from django.conf import settings
+import_module(settings.ROOT_URLCONF)
+import_module('blog.views')
+urls = time.perf_counter() - start
+
+print(json.dumps({
+    'setup': setup, 'setup_queries': setup_queries,
+    'urls': urls, 'urls_queries': len(queries) - setup_queries,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure how long a fresh process takes to set Django up and import the '
+        'URLconf and blog views, and how many queries that runs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Fresh processes to start.')
+
+    def handle(self, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE))
+        runs = [self.run(env) for _ in range(options['repeat'])]
+
+        for label in ('setup', 'urls'):
+            timings = [run[label] * 1000 for run in runs]
+            queries = max(run[f'{label}_queries'] for run in runs)
+            self.stdout.write(
+                f'{label:<6} median {statistics.median(timings):8.1f} ms, '
+                f'min {min(timings):8.1f} ms, {queries} queries'
+            )
+
+    def run(self, env):
+        process = subprocess.run(
+            [sys.executable, '-c', STARTUP_SCRIPT], env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+        )
+        if process.returncode:
+            raise CommandError(f'Startup failed:\n{process.stderr}')
+        return json.loads(process.stdout.splitlines()[-1])
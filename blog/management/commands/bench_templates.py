@@ -0,0 +1,84 @@
+import timeit
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine, engines
+from django.test import RequestFactory
+from django.utils import timezone
+
+from blog.models import Article
+from blog.profiling import TemplateProfiler
+
+INCLUDE_LOOP = """{% for article in articles %}{% include 'blog/article.html' %}{% endfor %}"""
+ROWS_TAG = """{% load blog_tags %}{% article_rows articles %}"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the cost of rendering article rows with {% include %} in a loop '
+        'against the {% article_rows %} tag, on in-memory articles.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=50, help='Articles per page.')
+        parser.add_argument('--repeat', type=int, default=100, help='Renders per measurement.')
+        parser.add_argument('--profile', action='store_true', help='Also print a per-template profile.')
+
+    def handle(self, **options):
+        engine = self.production_engine()
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = Context({'articles': self.articles(options['articles']), 'request': request})
+        repeat = options['repeat']
+
+        results = {}
+        for label, source in (('include loop', INCLUDE_LOOP), ('article_rows tag', ROWS_TAG)):
+            template = engine.from_string(source)
+            template.render(context)    # warm up the loaders
+            seconds = min(timeit.repeat(lambda: template.render(context), number=repeat, repeat=3))
+            results[label] = seconds / repeat * 1000
+            self.stdout.write(f'{label:<18} {results[label]:8.3f} ms/page')
+
+        overhead = results['include loop'] - results['article_rows tag']
+        self.stdout.write(
+            f'include overhead   {overhead:8.3f} ms/page, '
+            f'{overhead * 1000 / options["articles"]:.1f} us/row'
+        )
+
+        if options['profile']:
+            with TemplateProfiler() as profiler:
+                engine.from_string(INCLUDE_LOOP).render(context)
+            self.stdout.write(profiler.report())
+
+    def production_engine(self):
+        """
+        The configured engine with the cached loader and without template
+        debugging, as in production, whatever the current settings are.
+        """
+        configured = engines['django'].engine
+        loaders = configured.loaders
+        if configured.app_dirs:
+            loaders = [('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ])]
+        return Engine(
+            dirs=configured.dirs,
+            loaders=loaders,
+            libraries=configured.libraries,
+            debug=False,
+        )
+
+    def articles(self, count):
+        # unsaved, pre-annotated articles: only template work is measured
+        author = User(pk=1, username='author')
+        articles = []
+        for n in range(count):
+            article = Article(
+                pk=n + 1, title=f'Article {n}', slug=f'article-{n}', author=author,
+                content='Lorem ipsum dolor sit amet. ' * 20, publish=n % 5 != 0,
+                pub_date=timezone.now(),
+            )
+            article.num_likes = article.num_dislikes = n % 7
+            articles.append(article)
+        return articles
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import similarity
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the related articles of the articles changed since the last '
+        'run, and of those their changes affect.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every article.')
+        parser.add_argument('--top', type=int, default=similarity.TOP_K, help='Related articles kept per article.')
+
+    def handle(self, **options):
+        start = time.perf_counter()
+        count = similarity.rebuild(full=options['full'], k=options['top'])
+        self.stdout.write(f'Updated the related articles of {count} article(s) in {time.perf_counter() - start:.2f}s.')
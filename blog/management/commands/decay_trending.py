@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Article
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the trending scores of all articles to the current epoch and drop the '
+        'faded ones. apply_votes does this when an epoch begins, run it periodically '
+        '(e.g. daily) to clean up without waiting for votes.'
+    )
+
+    def handle(self, **options):
+        moved = Article.objects.rebase_trending()
+        self.stdout.write(f'Moved {moved} trending score(s) to the current epoch.')
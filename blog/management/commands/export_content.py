@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import bulk
+
+
+class Command(BaseCommand):
+    help = 'Export articles, users or votes as JSON lines or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=bulk.KINDS)
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help="File to write, standard output by default.",
+        )
+        parser.add_argument(
+            '--format', choices=bulk.FORMATS,
+            help='Output format, guessed from the file extension by default.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows fetched from the database at a time.',
+        )
+
+    def handle(self, kind, path, **options):
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive number.')
+        records = bulk.EXPORTERS[kind](batch_size=options['batch_size'])
+        if path == '-':
+            bulk.write_records(self.stdout, fmt, bulk.FIELDNAMES[kind], records)
+            return
+        try:
+            stream = open(path, 'w', newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(e)
+        with stream:
+            count = bulk.write_records(stream, fmt, bulk.FIELDNAMES[kind], records)
+        self.stderr.write(f'{kind}: {count} exported')
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import bulk
+
+
+class Command(BaseCommand):
+    help = 'Import articles, users or votes from a JSON lines or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=bulk.KINDS)
+        parser.add_argument('path', help="File to read, or '-' for standard input.")
+        parser.add_argument(
+            '--format', choices=bulk.FORMATS,
+            help='Input format, guessed from the file extension by default.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Records written per query and per transaction.',
+        )
+
+    def handle(self, kind, path, **options):
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive number.')
+        if path == '-':
+            result = self.import_records(kind, sys.stdin, fmt, options['batch_size'])
+        else:
+            try:
+                stream = open(path, newline='', encoding='utf-8')
+            except OSError as e:
+                raise CommandError(e)
+            # only close the files opened here, not standard input
+            with stream:
+                result = self.import_records(kind, stream, fmt, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{kind}: {result}'))
+
+    def import_records(self, kind, stream, fmt, batch_size):
+        records = bulk.read_records(stream, fmt)
+        return bulk.IMPORTERS[kind](records, batch_size=batch_size)
@@ -0,0 +1,135 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.utils import get_random_secret_key
+
+from blog import loadtest
+
+# Both run in the stand-in environment, against the throwaway database.
+SEED_SCRIPT = """
+import json, sys
+import django
+django.setup()
+from django.core.management import call_command
+from blog import loadtest
+call_command('migrate', verbosity=0)
+call_command('collectstatic', interactive=False, verbosity=0)
+print(json.dumps(loadtest.seed(**json.loads(sys.argv[1]))))
+"""
+
+SERVE_SCRIPT = """
+import sys
+import django
+django.setup()
+from blogger.wsgi import application
+from blog import loadtest
+loadtest.serve(application, workers=int(sys.argv[1]))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database, serve the site from pre-forked WSGI workers and '
+        'replay a mix of traffic against it, reporting throughput, latency and errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Server worker processes.')
+        parser.add_argument('--clients', type=int, default=8, help='Concurrent client threads.')
+        parser.add_argument('--runs', type=int, default=2000, help='Scenarios to replay, split among the clients.')
+        parser.add_argument('--warmup', type=int, default=100, help='Scenarios replayed first and not reported.')
+        parser.add_argument(
+            '--mix', default=loadtest.DEFAULT_MIX,
+            help=f"Scenario weights, from {', '.join(loadtest.SCENARIOS)}.",
+        )
+        parser.add_argument('--users', type=int, default=50, help='Users to seed, all logged in.')
+        parser.add_argument('--articles', type=int, default=500, help='Published articles to seed.')
+        parser.add_argument('--votes', type=int, default=2000, help='Votes to seed.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the data and the traffic.')
+        parser.add_argument(
+            '--app-settings', default='blogger.settings.prod',
+            help='Settings module the server runs with.',
+        )
+
+    def handle(self, **options):
+        try:
+            mix = loadtest.parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(e)
+        for name in ('workers', 'clients', 'runs', 'users', 'articles'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} must be a positive number.')
+
+        with tempfile.TemporaryDirectory(prefix='blog-loadtest-') as directory:
+            env = dict(
+                os.environ,
+                DJANGO_SETTINGS_MODULE=options['app_settings'],
+                DJANGO_SECRET_KEY=os.environ.get('DJANGO_SECRET_KEY') or get_random_secret_key(),
+                DJANGO_DEBUG='0',
+                DJANGO_ALLOWED_HOSTS='127.0.0.1',
+                DJANGO_DB_ENGINE='django.db.backends.sqlite3',
+                DJANGO_DB_NAME=os.path.join(directory, 'db.sqlite3'),
+                DJANGO_STATIC_ROOT=os.path.join(directory, 'static'),
+            )
+            if not os.environ.get('DJANGO_CACHE_BACKEND'):
+                # shared by the workers, like memcached in production
+                env.update(
+                    DJANGO_CACHE_BACKEND='django.core.cache.backends.filebased.FileBasedCache',
+                    DJANGO_CACHE_LOCATION=os.path.join(directory, 'cache'),
+                )
+            self.stdout.write('Seeding the database...')
+            fixture = self.seed(env, options)
+            with open(os.path.join(directory, 'server.log'), 'w+') as log:
+                server = subprocess.Popen(
+                    [sys.executable, '-c', SERVE_SCRIPT, str(options['workers'])],
+                    env=env, cwd=settings.BASE_DIR, stdout=subprocess.PIPE, stderr=log,
+                    universal_newlines=True, start_new_session=True,
+                )
+                try:
+                    port = server.stdout.readline().strip()
+                    if not port.isdigit():
+                        log.seek(0)
+                        raise CommandError(f'The server failed to start:\n{log.read()}')
+                    port = int(port)
+                    self.stdout.write(f"Serving with {options['workers']} workers, replaying...")
+                    loadtest.replay(port, fixture, mix, options['warmup'], options['clients'], seed=-1 - options['seed'])
+                    samples, elapsed = loadtest.replay(
+                        port, fixture, mix, options['runs'], options['clients'], seed=options['seed'])
+                finally:
+                    # the workers share the server's process group
+                    os.killpg(server.pid, signal.SIGTERM)
+                    server.wait()
+        self.report(loadtest.summarize(samples), elapsed)
+
+    def seed(self, env, options):
+        arguments = {name: options[name] for name in ('users', 'articles', 'votes', 'seed')}
+        process = subprocess.run(
+            [sys.executable, '-c', SEED_SCRIPT, json.dumps(arguments)], env=env, cwd=settings.BASE_DIR,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+        )
+        if process.returncode:
+            raise CommandError(f'Seeding failed:\n{process.stderr}')
+        return json.loads(process.stdout.splitlines()[-1])
+
+    def report(self, summary, elapsed):
+        self.stdout.write(
+            f"{'scenario':<10} {'requests':>8} {'errors':>7} {'throttled':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for label, row in summary.items():
+            self.stdout.write(
+                f"{label:<10} {row['requests']:>8} {row['errors']:>7} {row['throttled']:>9} "
+                f"{row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f}"
+            )
+        total = summary['total']
+        error_rate = total['errors'] / total['requests'] if total['requests'] else 0
+        self.stdout.write(
+            f"{total['requests']} requests in {elapsed:.1f} s: {total['requests'] / elapsed:.1f} req/s, "
+            f'{error_rate:.1%} errors'
+        )
@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from blog.profiling import TemplateProfiler
+
+
+class Command(BaseCommand):
+    help = 'Request a page in-process and report the render cost of each template and include.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="URL path to request, e.g. '/' or '/dashboard/'.")
+        parser.add_argument('--user', help='Username to log in as first.')
+        parser.add_argument('--host', default='localhost', help='Host header, must be in ALLOWED_HOSTS.')
+        parser.add_argument('--repeat', type=int, default=1, help='Requests to accumulate.')
+
+    def handle(self, path, **options):
+        client = Client(HTTP_HOST=options['host'])
+        if options['user']:
+            try:
+                client.force_login(User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"No user named '{options['user']}'.")
+        client.get(path)    # warm up the loaders
+        with TemplateProfiler() as profiler:
+            for _ in range(options['repeat']):
+                response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f'{path} answered {response.status_code}.')
+        self.stdout.write(profiler.report())
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import Article
+
+
+class Command(BaseCommand):
+    help = (
+        'Publish the scheduled articles whose publication date has come. Run it '
+        'from cron, or keep it running with --watch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Keep running, sleeping until the next article comes due.',
+        )
+        parser.add_argument(
+            '--max-sleep', type=float, default=60,
+            help='With --watch, seconds to wait at most before looking for newly scheduled articles.',
+        )
+
+    def handle(self, **options):
+        while True:
+            for article in Article.objects.publish_due():
+                self.stdout.write(f'Published {article.slug} (due {article.pub_date:%Y-%m-%d %H:%M})')
+            if not options['watch']:
+                return
+            # one indexed lookup tells how long nothing can come due
+            next_due = Article.objects.next_due()
+            sleep = options['max_sleep']
+            if next_due is not None:
+                sleep = min(sleep, max((next_due - timezone.now()).total_seconds(), 0))
+            time.sleep(sleep)
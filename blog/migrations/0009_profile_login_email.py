@@ -0,0 +1,37 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_login_email(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Profile = apps.get_model('blog', 'Profile')
+    claimed = set()
+    # the oldest account keeps an e-mail address shared by several users
+    for user in User.objects.order_by('pk').iterator():
+        email = (user.email or '').strip().lower() or None
+        if email in claimed:
+            email = None
+        elif email:
+            claimed.add(email)
+        updated = Profile.objects.filter(user_id=user.pk).update(login_email=email)
+        if not updated:
+            Profile.objects.create(user_id=user.pk, login_email=email)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0008_auto_20190119_0930'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='login_email',
+            field=models.EmailField(blank=True, editable=False, max_length=254, null=True, unique=True),
+        ),
+        migrations.RunPython(populate_login_email, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.text import slugify
+
+
+def deduplicate_slugs(apps, schema_editor):
+    Article = apps.get_model('blog', 'Article')
+    taken = set()
+    # the oldest article keeps a slug shared by several articles
+    for article in Article.objects.order_by('pk').only('pk', 'title', 'slug').iterator():
+        base = article.slug or slugify(article.title)[:120].strip('-') or 'article'
+        slug, n = base, 2
+        while slug in taken:
+            slug, n = f'{base}-{n}', n + 1
+        taken.add(slug)
+        if slug != article.slug:
+            Article.objects.filter(pk=article.pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_profile_login_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSlugRedirect',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_slug', models.SlugField(max_length=130, unique=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='slug',
+            field=models.SlugField(max_length=130),
+        ),
+        migrations.RunPython(deduplicate_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='article',
+            name='slug',
+            field=models.SlugField(max_length=130, unique=True),
+        ),
+        migrations.AddField(
+            model_name='articleslugredirect',
+            name='article',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='blog.Article'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_article_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleAutosave',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='autosave', serialize=False, to='blog.Article')),
+                ('content', models.TextField()),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArticleRevision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('delta', models.BinaryField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='blog.Article')),
+            ],
+            options={
+                'ordering': ('-pk',),
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_article_revisions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='article',
+            name='pub_date',
+            field=models.DateTimeField(blank=True, help_text='Leave empty to publish now, or set a future date to schedule the article.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['publish', 'pub_date'], name='blog_articl_publish_f3d930_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:37
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_votes(apps, schema_editor):
+    Article = apps.get_model('blog', 'Article')
+    for field, model in (('like_count', 'Like'), ('dislike_count', 'Dislike')):
+        votes = apps.get_model('blog', model).objects.filter(article=models.OuterRef('pk')).order_by()
+        votes = votes.values('article').annotate(n=models.Count('pk')).values('n')
+        Article.objects.update(**{field: Coalesce(models.Subquery(votes, output_field=models.IntegerField()), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_scheduled_publishing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingVote',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('likes', models.SmallIntegerField(default=0)),
+                ('dislikes', models.SmallIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='dislike_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='like_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pendingvote',
+            name='article',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='blog.Article'),
+        ),
+        migrations.RunPython(count_votes, migrations.RunPython.noop),
+    ]
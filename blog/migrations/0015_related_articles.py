@@ -0,0 +1,44 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_vote_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'ordering': ('article', 'rank'),
+            },
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='related_updated',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='relatedarticle',
+            name='article',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='blog.Article'),
+        ),
+        migrations.AddField(
+            model_name='relatedarticle',
+            name='related',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.Article'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='relatedarticle',
+            unique_together={('article', 'rank')},
+        ),
+    ]
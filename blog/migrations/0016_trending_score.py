@@ -0,0 +1,60 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:41
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def date_existing_votes(apps, schema_editor):
+    # when they were cast is unknown, the article's creation is the closest
+    # safe guess: old votes must not look like a burst of new ones
+    Article = apps.get_model('blog', 'Article')
+    created = Article.objects.filter(pk=models.OuterRef('article_id')).values('created')[:1]
+    # pending votes can outlive their article
+    created = Coalesce(models.Subquery(created), models.F('created'))
+    for model in ('Like', 'Dislike', 'PendingVote'):
+        apps.get_model('blog', model).objects.update(created=created)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_related_articles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='trending_updated',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='dislike',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='like',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pendingvote',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-trending_score'], name='blog_articl_trendin_7776bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['trending_updated'], name='blog_articl_trendin_2cc4ae_idx'),
+        ),
+        migrations.RunPython(date_existing_votes, migrations.RunPython.noop),
+    ]
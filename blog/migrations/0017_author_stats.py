@@ -0,0 +1,44 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def compute_author_stats(apps, schema_editor):
+    Article = apps.get_model('blog', 'Article')
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    published = Article.objects.filter(publish=True, pub_date__lte=django.utils.timezone.now())
+    rows = published.order_by().values('author').annotate(
+        articles=models.Count('pk'),
+        likes=models.Sum('like_count'),
+        dislikes=models.Sum('dislike_count'),
+        latest_pub_date=models.Max('pub_date'),
+    )
+    AuthorStats.objects.bulk_create(AuthorStats(user_id=row.pop('author'), **row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0009_alter_user_last_name_max_length'),
+        ('blog', '0016_trending_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='author_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('articles', models.PositiveIntegerField(default=0)),
+                ('likes', models.IntegerField(default=0)),
+                ('dislikes', models.IntegerField(default=0)),
+                ('latest_pub_date', models.DateTimeField(null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'author stats',
+            },
+        ),
+        migrations.RunPython(compute_author_stats, migrations.RunPython.noop),
+    ]
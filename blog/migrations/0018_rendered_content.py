@@ -0,0 +1,40 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:48
+
+from django.db import migrations, models
+
+from ._render_0018 import checksum, render
+
+
+def render_existing(apps, schema_editor):
+    Article = apps.get_model('blog', 'Article')
+    for pk, content in Article.objects.values_list('pk', 'content').iterator():
+        content_html, excerpt = render(content)
+        Article.objects.filter(pk=pk).update(
+            content_html=content_html, excerpt=excerpt, content_hash=checksum(content),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_author_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
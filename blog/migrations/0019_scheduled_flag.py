@@ -0,0 +1,29 @@
+# Generated by Django 2.1.5 on 2026-10-19 02:58
+
+from django.db import migrations, models
+
+
+def mark_scheduled(apps, schema_editor):
+    # until now unpublished articles with a date were the scheduled ones
+    Article = apps.get_model('blog', 'Article')
+    Article.objects.filter(publish=False, pub_date__isnull=False).update(scheduled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='scheduled',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_scheduled, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['scheduled', 'pub_date'], name='blog_articl_schedul_126458_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.1.5 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+def fill_title_search(apps, schema_editor):
+    Article = apps.get_model('blog', 'Article')
+    for pk, title in Article.objects.values_list('pk', 'title').iterator():
+        Article.objects.filter(pk=pk).update(title_search=title.lower())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0019_scheduled_flag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='title_search',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=240),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_title_search, migrations.RunPython.noop),
+    ]
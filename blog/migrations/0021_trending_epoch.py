@@ -0,0 +1,48 @@
+# Generated by Django 2.1.5 on 2026-10-19 03:14
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+# as in blog.models when this migration was written
+HALF_LIFE = timedelta(hours=24)
+EPOCH = datetime(2019, 1, 1, tzinfo=timezone.utc)
+EPOCH_LENGTH = 256 * HALF_LIFE
+
+
+def scale_to_epoch(apps, schema_editor):
+    # scores were decayed to their `trending_updated`, move them to the epoch
+    Article = apps.get_model('blog', 'Article')
+    now = timezone.now()
+    epoch = EPOCH + (now - EPOCH) // EPOCH_LENGTH * EPOCH_LENGTH
+    stamps = Article.objects.filter(trending_updated__isnull=False).order_by()
+    for stamp in list(stamps.values_list('trending_updated', flat=True).distinct()):
+        Article.objects.filter(trending_updated=stamp).update(
+            trending_score=F('trending_score') * 2 ** ((stamp - epoch) / HALF_LIFE),
+            trending_updated=epoch,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0020_title_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(scale_to_epoch, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='blog_articl_trendin_7776bb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='blog_articl_trendin_2cc4ae_idx',
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['trending_updated', '-trending_score'], name='blog_articl_trendin_a07859_idx'),
+        ),
+    ]
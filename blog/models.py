@@ -1,24 +1,178 @@
+import re
+from datetime import datetime, timedelta
+
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.shortcuts import reverse
 from django.http import HttpRequest
+from django.template.defaultfilters import slugify
+
+from . import revisions, sanitizer
+
+# A trending score is the sum of 2 ** ((cast - epoch) / TRENDING_HALF_LIFE)
+# over the votes, likes adding and dislikes taking away. Votes never need
+# decaying and the scores of all articles compare as stored: a vote a
+# half-life newer simply weighs twice as much. The epoch moves forward every
+# TRENDING_EPOCH_LENGTH to keep the weights within float range.
+TRENDING_HALF_LIFE = timedelta(hours=24)
+TRENDING_EPOCH = datetime(2019, 1, 1, tzinfo=timezone.utc)
+TRENDING_EPOCH_LENGTH = 256 * TRENDING_HALF_LIFE
+# scores worth less than this many votes cast now don't trend
+TRENDING_THRESHOLD = 0.01
+
+
+def trending_epoch(now):
+    return TRENDING_EPOCH + (now - TRENDING_EPOCH) // TRENDING_EPOCH_LENGTH * TRENDING_EPOCH_LENGTH
+
+
+def trending_weight(cast, epoch):
+    # what a vote cast at `cast` counts for in a score relative to `epoch`
+    return 2 ** ((cast - epoch) / TRENDING_HALF_LIFE)
+
+
+def chunks(items, size=500):
+    # SQLite limits the parameters of a query
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
-class PublishedArticleManager(models.Manager):
+class ArticleQuerySet(models.QuerySet):
+    def with_vote_counts(self):
+        """
+        Annotate `num_likes` and `num_dislikes`, the stored counters plus the
+        votes still pending in the log, which the `likes` and `dislikes`
+        properties use instead of queries of their own.
+        """
+        def pending(field):
+            votes = PendingVote.objects.filter(article=models.OuterRef('pk')).order_by()
+            votes = votes.values('article').annotate(n=models.Sum(field)).values('n')
+            return Coalesce(models.Subquery(votes, output_field=models.IntegerField()), 0)
+        return self.annotate(
+            num_likes=models.F('like_count') + pending('likes'),
+            num_dislikes=models.F('dislike_count') + pending('dislikes'),
+        )
+
+    def author_stats(self, user):
+        """
+        Totals over all the articles of `user`, computed by a single query.
+        """
+        def pending(field):
+            votes = PendingVote.objects.filter(article__author=models.OuterRef('author')).order_by()
+            votes = votes.values('article__author').annotate(n=models.Sum(field)).values('n')
+            return Coalesce(models.Subquery(votes, output_field=models.IntegerField()), 0)
+        stats = self.filter(author=user).order_by().values('author').annotate(
+            articles=models.Count('pk'),
+            drafts=models.Count('pk', filter=models.Q(publish=False)),
+            views=models.Sum('views'),
+            likes=models.Sum('like_count') + pending('likes'),
+            dislikes=models.Sum('dislike_count') + pending('dislikes'),
+        ).values('articles', 'drafts', 'views', 'likes', 'dislikes')
+        # not `first()`, ordering by pk would split the group
+        for row in stats:
+            return row
+        return {'articles': 0, 'drafts': 0, 'views': 0, 'likes': 0, 'dislikes': 0}
+
+    def trending(self, now=None, threshold=TRENDING_THRESHOLD):
+        """
+        Articles by trending score, highest first, leaving out those worth
+        less than `threshold` votes cast `now`. Scores on the current epoch
+        compare as stored, so this is a range scan of the
+        (trending_updated, -trending_score) index.
+        """
+        now = now or timezone.now()
+        epoch = trending_epoch(now)
+        return self.filter(
+            trending_updated=epoch, trending_score__gt=threshold * trending_weight(now, epoch),
+        ).order_by('-trending_score')
+
+    def rebase_trending(self, now=None, threshold=TRENDING_THRESHOLD):
+        """
+        Move the trending scores still relative to an earlier epoch to the
+        current one, one UPDATE per earlier epoch, and drop the scores worth
+        less than `threshold` votes cast `now` to 0. Returns the number of
+        scores moved.
+        """
+        now = now or timezone.now()
+        epoch = trending_epoch(now)
+        moved = 0
+        with transaction.atomic():
+            stamps = self.filter(trending_updated__lt=epoch).order_by().values_list('trending_updated', flat=True)
+            for stamp in list(stamps.distinct()):
+                moved += self.filter(trending_updated=stamp).update(
+                    trending_score=models.F('trending_score') * trending_weight(stamp, epoch),
+                    trending_updated=epoch,
+                )
+            floor = threshold * trending_weight(now, epoch)
+            self.filter(trending_updated=epoch, trending_score__gt=-floor, trending_score__lt=floor).update(
+                trending_score=0, trending_updated=None)
+        return moved
+
+    def publish_due(self, now=None):
+        """
+        Publish the scheduled articles whose date has come, found by a range
+        scan of the (scheduled, pub_date) index and flipped by one update,
+        then send `article_published` for exactly those. Returns them.
+        """
+        from .signals import article_published
+
+        now = now or timezone.now()
+        with transaction.atomic():
+            due = list(self.select_for_update().filter(scheduled=True, pub_date__lte=now).order_by('pub_date'))
+            self.filter(pk__in=[article.pk for article in due]).update(publish=True, scheduled=False, updated=now)
+        for article in due:
+            article.publish, article.scheduled, article.updated = True, False, now
+        if due:
+            article_published.send(sender=self.model, articles=due)
+        return due
+
+    def next_due(self):
+        """
+        When the next scheduled article comes due, None if there is none.
+        """
+        return self.filter(scheduled=True).order_by('pub_date').values_list(
+            'pub_date', flat=True).first()
+
+
+class PublishedArticleManager(models.Manager.from_queryset(ArticleQuerySet)):
     def get_queryset(self):
-        return super().get_queryset().filter(publish=True)
+        # `publish_due` flips scheduled articles, the date check hides them
+        # until it has run
+        return super().get_queryset().filter(publish=True, pub_date__lte=timezone.now())
 
 class Article(models.Model):
     title = models.CharField(unique=True, max_length=120)
+    # `title` lowercased, which the admin search matches prefixes of
+    title_search = models.CharField(max_length=240, db_index=True, editable=False)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     content = models.TextField()
+    # `content` sanitized and boiled down to text, see `render_content`
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=sanitizer.EXCERPT_LENGTH, blank=True, editable=False)
+    content_hash = models.CharField(max_length=40, blank=True, editable=False)
     publish = models.BooleanField(default=False)
-    pub_date = models.DateTimeField(blank=True, null=True)
-    slug = models.SlugField()
+    # waiting for `pub_date`, when `publish_due` publishes it
+    scheduled = models.BooleanField(default=False, editable=False)
+    pub_date = models.DateTimeField(
+        blank=True, null=True,
+        help_text='Leave empty to publish now, or set a future date to schedule the article.',
+    )
+    slug = models.SlugField(unique=True, max_length=130)
+    views = models.PositiveIntegerField(default=0, editable=False)
+    # applied in batches from `PendingVote` by `manage.py apply_votes`
+    like_count = models.IntegerField(default=0, editable=False)
+    dislike_count = models.IntegerField(default=0, editable=False)
+    # likes minus dislikes, weighted by when they were cast relative to the
+    # epoch `trending_updated`, see `TRENDING_HALF_LIFE`
+    trending_score = models.FloatField(default=0, editable=False)
+    trending_updated = models.DateTimeField(null=True, editable=False)
+    # when `blog.similarity` last computed the related articles
+    related_updated = models.DateTimeField(null=True, editable=False)
 
-    objects = models.Manager()
+    objects = ArticleQuerySet.as_manager()
     published = PublishedArticleManager()
 
     def __str__(self):
@@ -27,21 +181,122 @@ class Article(models.Model):
     def get_absolute_url(self):
         return reverse('article_detail', kwargs={'slug': self.slug})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    @classmethod
+    def unique_slug(cls, title, exclude_pk=None, reserved=()):
+        """
+        Slugify `title`, appending the first free `-<n>` suffix when the slug
+        is taken (or in `reserved`). The candidates are the base and the
+        slugs starting with `<base>-`, a single range scan of the unique slug
+        index.
+        """
+        base = slugify(title)[:cls._meta.get_field('slug').max_length - 10].strip('-') or 'article'
+        # no slug character sorts below '-', so [base, base + '.') holds only
+        # the base itself and `<base>-...`; `startswith` would be a LIKE the
+        # index can't serve
+        taken = cls.objects.filter(slug__gte=base, slug__lt=base + '.').exclude(pk=exclude_pk).order_by()
+        taken = set(taken.values_list('slug', flat=True)).union(reserved)
+        if base not in taken:
+            return base
+        suffix = re.compile(re.escape(base) + r'-(\d+)$')
+        numbers = {int(m.group(1)) for m in map(suffix.match, taken) if m}
+        n = 2
+        while n in numbers:
+            n += 1
+        return f'{base}-{n}'
+
     def save(self, *args, **kwargs):
-        if self.publish:
-            if not self.pub_date:
-                self.pub_date = timezone.now()
-        else: 
+        now = timezone.now()
+        if self.pub_date and self.pub_date > now:
+            # scheduled, `publish_due` publishes it when the date comes
+            self.publish, self.scheduled = False, True
+        elif self.publish or (self.scheduled and self.pub_date):
+            # including a schedule that came due before `publish_due` ran
+            self.publish, self.scheduled = True, False
+            self.pub_date = self.pub_date or now
+        else:
+            self.scheduled = False
             self.pub_date = None
-        super(Article, self).save(*args, **kwargs)
+        loaded = getattr(self, '_loaded_values', {})
+        old_slug = loaded.get('slug')
+        old_content = loaded.get('content')
+        generate_slug = not self.slug or self.title != loaded.get('title', self.title)
+        if generate_slug:
+            self.slug = self.unique_slug(self.title, exclude_pk=self.pk)
+        self.title_search = self.title.lower()
+        self.render_content()
+        for attempt in range(3):
+            try:
+                with transaction.atomic():
+                    super(Article, self).save(*args, **kwargs)
+                break
+            except IntegrityError:
+                # another article took the slug in the meantime
+                if not generate_slug or attempt == 2:
+                    raise
+                self.slug = self.unique_slug(self.title, exclude_pk=self.pk)
+        if old_slug and old_slug != self.slug:
+            # keep links to the previous title working
+            ArticleSlugRedirect.objects.filter(old_slug=self.slug).delete()
+            ArticleSlugRedirect.objects.update_or_create(old_slug=old_slug, defaults={'article': self})
+        if old_content is not None and old_content != self.content:
+            ArticleRevision.objects.create(
+                article=self,
+                delta=revisions.compress(revisions.diff(self.content, old_content)),
+            )
+        if self.publish and not loaded.get('publish'):
+            from .signals import article_published
+            article_published.send(sender=Article, articles=[self])
+        self._loaded_values = {
+            'title': self.title, 'slug': self.slug, 'content': self.content, 'publish': self.publish,
+        }
+
+    def render_content(self):
+        """
+        Store the sanitized HTML and excerpt of the content, unless they are
+        already those of this content.
+        """
+        content_hash = revisions.checksum(self.content)
+        if content_hash != self.content_hash:
+            self.content_html, self.excerpt = sanitizer.render(self.content)
+            self.content_hash = content_hash
 
     @property
     def likes(self):
-        return self.like_set.count()
+        if hasattr(self, 'num_likes'):
+            return self.num_likes
+        return self.like_count + self.pending_votes()['likes']
 
     @property
     def dislikes(self):
-        return self.dislike_set.count()
+        if hasattr(self, 'num_dislikes'):
+            return self.num_dislikes
+        return self.dislike_count + self.pending_votes()['dislikes']
+
+    def get_related_articles(self):
+        """
+        The precomputed most similar published articles, best first, read
+        with one query on the (article, rank) index.
+        """
+        links = self.related_links.filter(
+            related__publish=True, related__pub_date__lte=timezone.now(),
+        ).select_related('related__author').order_by('rank')
+        return [link.related for link in links]
+
+    def pending_votes(self):
+        return PendingVote.objects.filter(article=self).aggregate(
+            likes=Coalesce(models.Sum('likes'), 0),
+            dislikes=Coalesce(models.Sum('dislikes'), 0),
+        )
+
+    @property
+    def is_scheduled(self):
+        return self.scheduled
 
     @property
     def popularity_score(self):
@@ -49,6 +304,158 @@ class Article(models.Model):
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            # an author's articles, newest first, for the dashboard
+            models.Index(fields=['author', '-created']),
+            # published articles by date
+            models.Index(fields=['publish', 'pub_date']),
+            # scheduled articles coming due
+            models.Index(fields=['scheduled', 'pub_date']),
+            # the trending page, see `ArticleQuerySet.trending`
+            models.Index(fields=['trending_updated', '-trending_score']),
+        ]
+
+
+class ArticleSlugRedirect(models.Model):
+    old_slug = models.SlugField(unique=True, max_length=130)
+    article = models.ForeignKey(Article, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f'{self.old_slug} -> {self.article.slug}'
+
+
+class RelatedArticle(models.Model):
+    """
+    One of the most similar articles of an article, precomputed by
+    `manage.py build_related_articles`.
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ('article', 'rank')
+        unique_together = (('article', 'rank'),)
+
+    def __str__(self):
+        return f'{self.article.title} -> {self.related.title}'
+
+
+class ArticleRevision(models.Model):
+    """
+    The content an article had before an edit, stored as the compressed
+    changes that turn the edited content back into it. The current content
+    is always on the article itself.
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='revisions')
+    created = models.DateTimeField(auto_now_add=True)
+    delta = models.BinaryField()
+
+    class Meta:
+        ordering = ('-pk',)
+
+    def __str__(self):
+        return f'{self.article.title} before {self.created:%Y-%m-%d %H:%M}'
+
+    def get_content(self):
+        """
+        Rebuild the content by undoing, newest first, this edit and every
+        later one.
+        """
+        deltas = ArticleRevision.objects.filter(article_id=self.article_id, pk__gte=self.pk)
+        content = self.article.content
+        for delta in deltas.order_by('-pk').values_list('delta', flat=True):
+            content = revisions.apply_changes(content, revisions.decompress(delta))
+        return content
+
+
+class ArticleAutosave(models.Model):
+    """
+    The unsaved draft of an article being edited, kept up to date by the
+    autosave endpoint and discarded when the article is saved.
+    """
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='autosave')
+    content = models.TextField()
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Draft of {self.article.title}'
+
+    @property
+    def checksum(self):
+        return revisions.checksum(self.content)
+
+
+class AuthorStatsManager(models.Manager):
+    def refresh(self, user_ids, create=True):
+        """
+        Recompute the rollups of the authors `user_ids` with one grouped
+        query per chunk of them. With `create=False` only existing rollups are updated, for
+        authors that may be on their way out.
+        """
+        user_ids = set(user_ids)
+        totals = {user_id: {'articles': 0, 'likes': 0, 'dislikes': 0, 'latest_pub_date': None} for user_id in user_ids}
+        for chunk in chunks(sorted(user_ids)):
+            rows = Article.published.filter(author_id__in=chunk).order_by().values('author').annotate(
+                articles=models.Count('pk'),
+                likes=models.Sum('like_count'),
+                dislikes=models.Sum('dislike_count'),
+                latest_pub_date=models.Max('pub_date'),
+            )
+            for row in rows:
+                totals[row.pop('author')] = row
+        for user_id, values in totals.items():
+            if create:
+                self.update_or_create(user_id=user_id, defaults=values)
+            else:
+                self.filter(user_id=user_id).update(**values)
+
+
+class AuthorStats(models.Model):
+    """
+    Totals over the published articles of an author, kept up to date by
+    signals and `apply_votes` so the user page doesn't compute them.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='author_stats')
+    articles = models.PositiveIntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    dislikes = models.IntegerField(default=0)
+    latest_pub_date = models.DateTimeField(null=True)
+
+    objects = AuthorStatsManager()
+
+    class Meta:
+        verbose_name_plural = 'author stats'
+
+    def __str__(self):
+        return f'Stats of {self.user.username}'
+
+
+class ProfileManager(models.Manager):
+    def create_for_users(self, users, batch_size=None, profile_fields=None):
+        """
+        Create the profiles of `users` in bulk, e.g. after `User.objects.bulk_create`
+        which doesn't send the `post_save` signal that creates them one by one.
+        `profile_fields` optionally maps a user pk to extra profile values.
+        """
+        from .email_authentication import normalize_login_email
+
+        emails = {normalize_login_email(user.email) for user in users} - {None}
+        claimed = set()
+        for chunk in chunks(sorted(emails)):
+            claimed.update(self.filter(login_email__in=chunk).values_list('login_email', flat=True))
+        profiles = []
+        for user in users:
+            email = normalize_login_email(user.email)
+            if email in claimed:
+                email = None
+            elif email:
+                claimed.add(email)
+            fields = (profile_fields or {}).get(user.pk, {})
+            profiles.append(self.model(user=user, login_email=email, **fields))
+        return self.bulk_create(profiles, batch_size=batch_size)
 
 
 class Profile(models.Model):
@@ -60,14 +467,126 @@ class Profile(models.Model):
     twitter = models.CharField(blank=True, null=True, max_length=50)
     website = models.URLField(blank=True, null=True)
     facebook = models.CharField(blank=True, null=True, max_length=50)
+    # normalized copy of `user.email`, indexed for e-mail logins
+    login_email = models.EmailField(unique=True, blank=True, null=True, editable=False)
+
+    objects = ProfileManager()
 
     def __str__(self):
         return f'Profile, {self.user.username}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            # files are compared by name, see `FieldFile.__eq__`
+            f.attname: getattr(getattr(self, f.attname), 'name', None) if isinstance(f, models.FileField)
+            else getattr(self, f.attname)
+            for f in self._meta.concrete_fields
+        }
+
+    def get_dirty_fields(self):
+        """
+        Names of the fields changed since the profile was loaded, every
+        concrete field for a profile that hasn't been saved yet.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        fields = [f for f in self._meta.concrete_fields if not f.primary_key]
+        if loaded is None:
+            return [f.name for f in fields]
+        return [
+            f.name for f in fields
+            if f.attname in loaded and getattr(self, f.attname) != loaded[f.attname]
+        ]
+
+
+class PendingVoteManager(models.Manager):
+    def apply(self, batch_size=10000):
+        """
+        Fold the logged votes into the article counters, one UPDATE per
+        article and batch, and delete them. Only the rows read are deleted,
+        so votes logged meanwhile wait for the next run. Returns the number
+        of votes applied.
+
+        Runs can overlap (e.g. cron and `--watch`): each batch is claimed by
+        deleting it before it is applied, and rows another run has locked
+        are skipped where the database supports SKIP LOCKED.
+        """
+        if Article.objects.filter(trending_updated__lt=trending_epoch(timezone.now())).exists():
+            # the first run of a new epoch moves every score to it
+            Article.objects.rebase_trending()
+        applied = 0
+        while True:
+            now = timezone.now()
+            epoch = trending_epoch(now)
+            with transaction.atomic():
+                rows = list(
+                    self.select_for_update(skip_locked=True).order_by('pk')
+                    .values_list('pk', 'article_id', 'likes', 'dislikes', 'created')[:batch_size]
+                )
+                claimed = sum(self.filter(pk__in=chunk).delete()[0] for chunk in chunks([row[0] for row in rows]))
+                if claimed != len(rows):
+                    # another run applied some of them first, read the log again
+                    transaction.set_rollback(True)
+                    continue
+                totals = {}
+                for _, article_id, likes, dislikes, created in rows:
+                    total = totals.setdefault(article_id, [0, 0, 0.0])
+                    total[0] += likes
+                    total[1] += dislikes
+                    total[2] += (likes - dislikes) * trending_weight(created, epoch)
+                scores, authors = {}, set()
+                for chunk in chunks(sorted(totals)):
+                    locked = Article.objects.filter(pk__in=chunk).select_for_update()
+                    for pk, author_id, score, updated in locked.values_list(
+                            'pk', 'author_id', 'trending_score', 'trending_updated'):
+                        scores[pk] = (score, updated)
+                        authors.add(author_id)
+                for article_id, (likes, dislikes, trending) in totals.items():
+                    if article_id not in scores:
+                        continue    # deleted
+                    score, updated = scores[article_id]
+                    if updated is not None:
+                        # 1 unless a new epoch began during this run
+                        score *= trending_weight(updated, epoch)
+                    Article.objects.filter(pk=article_id).update(
+                        like_count=models.F('like_count') + likes,
+                        dislike_count=models.F('dislike_count') + dislikes,
+                        trending_score=score + trending,
+                        trending_updated=epoch,
+                    )
+                AuthorStats.objects.refresh(authors)
+            applied += len(rows)
+            if len(rows) < batch_size:
+                return applied
+
+
+class PendingVote(models.Model):
+    """
+    Append-only log of vote changes, +1 or -1, not yet applied to the
+    article counters. Votes on a popular article only insert here instead
+    of all updating its row. There is no foreign key constraint, so an
+    insert doesn't lock the article either; votes left by deleted articles
+    are dropped when applied.
+    """
+    article = models.ForeignKey(Article, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    likes = models.SmallIntegerField(default=0)
+    dislikes = models.SmallIntegerField(default=0)
+    # when the vote was cast, also for a removed one
+    created = models.DateTimeField(default=timezone.now)
+
+    objects = PendingVoteManager()
+
 
 class Like(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.ForeignKey)
     article = models.ForeignKey(Article, on_delete=models.CASCADE)
+    created = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         unique_together = (('user', 'article'),)
@@ -76,6 +595,7 @@ class Like(models.Model):
 class Dislike(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.ForeignKey)
     article = models.ForeignKey(Article, on_delete=models.CASCADE)
+    created = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         unique_together = (('user', 'article'),)
@@ -0,0 +1,64 @@
+from django.core.paginator import Paginator
+from django.db import connections, DatabaseError
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """
+    The planner's row estimate for the table of `model`, None when the
+    database doesn't keep one (SQLite only does after `ANALYZE`).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        'postgresql': ('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table]),
+        'mysql': (
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s',
+            [table]
+        ),
+        'sqlite': ('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table]),
+    }
+    if connection.vendor not in queries:
+        return None
+    sql, params = queries[connection.vendor]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    # sqlite_stat1 stores "<rows> <rows per index column> ..."
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Avoids `COUNT(*)` over large unfiltered tables by using the database's
+    row estimate for the page count. Filtered querysets, and tables with
+    fewer than `exact_threshold` estimated rows, are still counted exactly.
+    """
+    exact_threshold = 10000
+
+    @cached_property
+    def count(self):
+        object_list = self.object_list
+        if isinstance(object_list, QuerySet) and not object_list.query.where:
+            estimate = estimated_row_count(object_list.model, using=object_list.db)
+            if estimate is not None and estimate > self.exact_threshold:
+                return estimate
+        return super().count
+
+
+class KnownCountPaginator(Paginator):
+    """
+    Paginates with a count that is already known, e.g. from a rollup,
+    instead of running `COUNT(*)`.
+    """
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
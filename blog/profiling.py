@@ -0,0 +1,80 @@
+"""
+Template render profiling.
+
+`TemplateProfiler` patches the template engine while it is active and
+records, for every template rendered, how often it ran, its total time
+(including the templates it includes or extends) and its own time
+(excluding them). `{% include %}` tags are timed separately, so the cost
+of the include machinery itself shows up as the difference between an
+include's time and the time of the template it rendered.
+"""
+import time
+from collections import defaultdict
+
+from django.template import loader_tags
+from django.template.base import Template
+
+
+class TemplateStats:
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.own = 0.0
+
+
+class TemplateProfiler:
+    def __init__(self):
+        self.templates = defaultdict(TemplateStats)
+        self.includes = defaultdict(TemplateStats)
+        self._stack = []
+
+    def __enter__(self):
+        self._template_render = Template._render
+        self._include_render = loader_tags.IncludeNode.render
+        Template._render = self._timed(self._template_render, self.templates, self._template_name)
+        loader_tags.IncludeNode.render = self._timed(self._include_render, self.includes, self._include_name)
+        return self
+
+    def __exit__(self, *exc_info):
+        Template._render = self._template_render
+        loader_tags.IncludeNode.render = self._include_render
+
+    @staticmethod
+    def _template_name(template, context):
+        return template.origin.template_name or template.name or '<string>'
+
+    @staticmethod
+    def _include_name(node, context):
+        return str(node.template.var)
+
+    def _timed(self, render, stats, get_name):
+        profiler = self
+
+        def timed_render(node, context):
+            name = get_name(node, context)
+            profiler._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return render(node, context)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = profiler._stack.pop()
+                if profiler._stack:
+                    profiler._stack[-1] += elapsed
+                entry = stats[name]
+                entry.calls += 1
+                entry.total += elapsed
+                entry.own += elapsed - children
+        return timed_render
+
+    def report(self):
+        lines = []
+        for title, stats in (('Templates', self.templates), ('Includes', self.includes)):
+            lines.append(f'{title}:')
+            lines.append(f'  {"name":<40} {"calls":>6} {"total ms":>10} {"own ms":>10} {"ms/call":>9}')
+            for name, entry in sorted(stats.items(), key=lambda item: -item[1].total):
+                lines.append(
+                    f'  {name:<40} {entry.calls:>6} {entry.total * 1000:>10.2f} '
+                    f'{entry.own * 1000:>10.2f} {entry.total * 1000 / entry.calls:>9.3f}'
+                )
+        return '\n'.join(lines)
@@ -0,0 +1,90 @@
+"""
+Cache-backed rate limiting.
+
+Limits are configured per scope in `settings.BLOG_RATELIMITS`, e.g.
+`{'vote': '30/m'}`, and applied with the `ratelimit` decorator. Each
+client gets a bucket of `limit` requests that refills continuously over
+the period. The bucket is tracked with a counter per period window: the
+current window's count plus the previous window's count, weighted by how
+much of it still overlaps the last period. That needs nothing but the
+cache's atomic `add` and `incr`, so workers sharing a cache share limits.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+class HttpResponseTooManyRequests(HttpResponse):
+    status_code = 429
+
+
+def parse_rate(rate):
+    """
+    '30/m' -> (30, 60).
+    """
+    limit, _, period = rate.partition('/')
+    return int(limit), PERIODS[period.strip()[0]]
+
+
+def client_key(request, key='user_or_ip'):
+    if key in ('user', 'user_or_ip') and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if key == 'user':
+        return None
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def hit(bucket, limit, period, now=None):
+    """
+    Count a request against `bucket`. Returns 0 when it is allowed, else
+    the seconds until it would be.
+    """
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    current = f'ratelimit:{bucket}:{int(window)}'
+    cache.add(current, 0, period * 2)
+    try:
+        count = cache.incr(current)
+    except ValueError:
+        # the counter just expired, or the cache doesn't keep anything
+        return 0
+    previous = cache.get(f'ratelimit:{bucket}:{int(window) - 1}', 0)
+    overlap = 1 - elapsed / period
+    if previous * overlap + count <= limit:
+        return 0
+    if count <= limit:
+        # wait for the previous window to slide out far enough
+        return math.ceil(period * (overlap - (limit - count) / previous))
+    # wait for this window to end and slide out far enough
+    return math.ceil(period * (overlap + 1 - limit / count))
+
+
+def ratelimit(scope, key='user_or_ip', when=None):
+    """
+    Limit a view to the rate configured for `scope`, per user or client IP
+    (`key` is 'user', 'ip' or 'user_or_ip'). `when(request)` can restrict the
+    limit to some requests. Requests over the limit get a 429 with a
+    Retry-After header.
+    """
+    def decorator(view):
+        @wraps(view)
+        def limited_view(request, *args, **kwargs):
+            rate = getattr(settings, 'BLOG_RATELIMITS', {}).get(scope)
+            client = client_key(request, key)
+            if rate and client and (when is None or when(request)):
+                limit, period = parse_rate(rate)
+                retry_after = hit(f'{scope}:{client}', limit, period)
+                if retry_after:
+                    response = HttpResponseTooManyRequests(
+                        'Too many requests, please try again later.', content_type='text/plain')
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return limited_view
+    return decorator
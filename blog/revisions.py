@@ -0,0 +1,94 @@
+"""
+Compact content deltas, for article revisions and autosave.
+
+A delta is a list of `[start, end, text]` replacements, ordered and
+non-overlapping, with `start` and `end` character offsets into the source
+text. Deltas are computed line by line, and changed lines are refined word
+by word, so an edit is stored roughly at the size of what it changed.
+"""
+import hashlib
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+from itertools import accumulate
+from os.path import commonprefix
+
+LINES = re.compile(r'[^\n]*\n?')
+WORDS = re.compile(r'\S*\s*')
+
+
+class InvalidChanges(ValueError):
+    pass
+
+
+def normalize_newlines(text):
+    # browsers submit textareas with \r\n but edit them with \n
+    return text.replace('\r\n', '\n')
+
+
+def checksum(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def tokenize(text, pattern):
+    return [token for token in pattern.findall(text) if token]
+
+
+def diff(source, target):
+    """
+    The replacements turning `source` into `target`.
+    """
+    # most edits touch one place: only diff what lies between the common
+    # prefix and suffix
+    prefix = len(commonprefix([source, target]))
+    suffix = len(commonprefix([source[prefix:][::-1], target[prefix:][::-1]]))
+    changes = []
+    _diff(source[prefix:len(source) - suffix], target[prefix:len(target) - suffix], prefix, LINES, changes)
+    return changes
+
+
+def _diff(source, target, offset, pattern, changes):
+    a, b = tokenize(source, pattern), tokenize(target, pattern)
+    positions = [0] + list(accumulate(map(len, a)))
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            continue
+        start, end = offset + positions[i1], offset + positions[i2]
+        new = ''.join(b[j1:j2])
+        if tag == 'replace' and pattern is LINES:
+            _diff(''.join(a[i1:i2]), new, start, WORDS, changes)
+        else:
+            changes.append([start, end, new])
+
+
+def apply_changes(source, changes):
+    """
+    Apply replacements to `source`, raising `InvalidChanges` when they are
+    malformed, out of order or out of range.
+    """
+    if not isinstance(changes, list):
+        raise InvalidChanges('Changes are a list of [start, end, text] replacements.')
+    parts = []
+    position = 0
+    for change in changes:
+        try:
+            start, end, text = change
+        except (TypeError, ValueError):
+            raise InvalidChanges('Changes are a list of [start, end, text] replacements.')
+        if not (isinstance(start, int) and isinstance(end, int) and isinstance(text, str)):
+            raise InvalidChanges('Changes are a list of [start, end, text] replacements.')
+        if not position <= start <= end <= len(source):
+            raise InvalidChanges('Changes must be ordered, non-overlapping and in range.')
+        parts += [source[position:start], text]
+        position = end
+    parts.append(source[position:])
+    return ''.join(parts)
+
+
+def compress(changes):
+    return zlib.compress(json.dumps(changes, separators=(',', ':')).encode())
+
+
+def decompress(delta):
+    return json.loads(zlib.decompress(delta).decode())
@@ -0,0 +1,133 @@
+"""
+Sanitized HTML and plain-text excerpts of article content.
+
+Articles are written in CKEditor, so their content is HTML from the
+user. `render` keeps the tags and attributes allowed below, drops
+everything else (and the content of scripts and styles), and collects the
+text for the excerpt in the same parse. It runs once when an article is
+saved and the results are stored, so showing an article never parses
+HTML. Content without markup predates rich text and is rendered as
+paragraphs, like the `linebreaks` filter did.
+"""
+import re
+from html import escape
+from html.parser import HTMLParser
+
+from django.core.cache import cache
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 300
+PREVIEW_CACHE_TIMEOUT = 60 * 60
+
+# tag -> allowed attributes, matching what the editor toolbar can produce
+ALLOWED_TAGS = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    **{tag: set() for tag in (
+        'p', 'br', 'hr', 'div', 'span', 'strong', 'b', 'em', 'i', 'u', 's', 'sub', 'sup',
+        'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'code',
+        'ul', 'ol', 'li', 'table', 'thead', 'tbody', 'tr', 'th', 'td',
+    )},
+}
+VOID_TAGS = frozenset({'br', 'hr', 'img'})
+# dropped along with everything inside them
+DROPPED_TAGS = frozenset({'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'textarea'})
+# tags that separate words in the excerpt
+BLOCK_TAGS = frozenset({
+    'p', 'br', 'hr', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre',
+    'ul', 'ol', 'li', 'table', 'tr', 'th', 'td',
+})
+URL_ATTRIBUTES = frozenset({'href', 'src'})
+ALLOWED_SCHEMES = frozenset({'http', 'https', 'mailto'})
+
+MARKUP = re.compile(r'<[a-zA-Z/!]')
+SCHEME = re.compile(r'([a-zA-Z][a-zA-Z0-9+.-]*):')
+# browsers ignore these inside URLs, so "java\tscript:" is still a scheme
+URL_IGNORED = re.compile(r'[\x00-\x20\x7f]+')
+
+
+def is_safe_url(url):
+    scheme = SCHEME.match(URL_IGNORED.sub('', url))
+    return scheme is None or scheme.group(1).lower() in ALLOWED_SCHEMES
+
+
+class Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS or self.dropping:
+            self.dropping += tag in DROPPED_TAGS
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append('\n')
+        if tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_TAGS[tag]
+        attributes = ''.join(
+            f' {name}="{escape(value)}"' for name, value in attrs
+            if name in allowed and value is not None and (name not in URL_ATTRIBUTES or is_safe_url(value))
+        )
+        if tag == 'a':
+            attributes += ' rel="nofollow"'
+        self.html.append(f'<{tag}{attributes}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        if self.dropping:
+            self.dropping -= tag in DROPPED_TAGS
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append('\n')
+        if tag in self.open_tags:
+            # close whatever was left open inside it
+            while True:
+                open_tag = self.open_tags.pop()
+                self.html.append(f'</{open_tag}>')
+                if open_tag == tag:
+                    break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.html.append(escape(data, quote=False))
+            self.text.append(data)
+
+    def close(self):
+        super().close()
+        self.html.extend(f'</{tag}>' for tag in reversed(self.open_tags))
+        self.open_tags = []
+
+
+def excerpt(text):
+    return Truncator(' '.join(text.split())).chars(EXCERPT_LENGTH)
+
+
+def render(content):
+    """
+    The sanitized HTML of `content` and its plain-text excerpt.
+    """
+    if not MARKUP.search(content):
+        return linebreaks(content, autoescape=True), excerpt(content)
+    sanitizer = Sanitizer()
+    sanitizer.feed(content)
+    sanitizer.close()
+    return ''.join(sanitizer.html), excerpt(''.join(sanitizer.text))
+
+
+def cached_render(content, content_hash):
+    """
+    `render`, cached by the hash of `content`, for drafts that aren't saved
+    to an article (and its stored rendering) yet.
+    """
+    key = f'blog:render:{content_hash}'
+    rendered = cache.get(key)
+    if rendered is None:
+        rendered = render(content)
+        cache.set(key, rendered, PREVIEW_CACHE_TIMEOUT)
+    return rendered
@@ -1,13 +1,129 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import Signal, receiver
 from django.conf import settings
 
-from .models import Profile
+from .email_authentication import invalidate_cached_user, normalize_login_email
+from .models import Article, AuthorStats, Dislike, Like, PendingVote, Profile
+
+# Sent with `articles`, the articles that just went live, whether saved as
+# published or published on schedule by `manage.py publish_due`. Caches,
+# feeds and search indexes hook in here.
+article_published = Signal(providing_args=['articles'])
+
+
+def claimable_login_email(user):
+    """
+    The normalized e-mail of `user`, or None when another account already
+    logs in with that address.
+    """
+    email = normalize_login_email(user.email)
+    if email and Profile.objects.filter(login_email=email).exclude(user=user).exists():
+        return None
+    return email
+
+
+def claim_login_email(user, create=False):
+    """
+    Create (or update) the profile of `user` with its claimable login e-mail.
+    Returns the login e-mail the profile got.
+    """
+    def save(login_email):
+        if create:
+            Profile.objects.create(user=user, login_email=login_email)
+        else:
+            Profile.objects.filter(user=user).update(login_email=login_email)
+
+    login_email = claimable_login_email(user)
+    try:
+        with transaction.atomic():
+            save(login_email)
+    except IntegrityError:
+        if login_email is None:
+            raise
+        # another account claimed the address since it was checked
+        login_email = None
+        save(login_email)
+    return login_email
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def user_is_loaded(sender, instance, **kwargs):
+    # read from __dict__ so a deferred e-mail isn't fetched
+    instance._loaded_email = instance.__dict__.get('email')
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def user_is_created(sender, instance, created, **kwargs):
+def user_is_created(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Create the profile of a new user, and afterwards only write to it when
+    something it depends on changed. Saves restricted with `update_fields`
+    (e.g. `last_login` on each login) only touch the profile when they
+    include the e-mail.
+    """
     if created:
-        Profile.objects.create(user=instance)
-    else:
-        instance.profile.save()
\ No newline at end of file
+        claim_login_email(instance, create=True)
+    elif update_fields is None or 'email' in update_fields:
+        profile_is_loaded = type(instance).profile.is_cached(instance)
+        if instance.email != getattr(instance, '_loaded_email', None):
+            login_email = claim_login_email(instance)
+            if profile_is_loaded:
+                instance.profile.login_email = login_email
+                if hasattr(instance.profile, '_loaded_values'):
+                    instance.profile._loaded_values['login_email'] = login_email
+        if update_fields is None and profile_is_loaded:
+            # profile changes made through `user.profile` are saved with the user
+            profile = instance.profile
+            dirty_fields = profile.get_dirty_fields()
+            if profile.pk is None:
+                profile.save()
+            elif dirty_fields:
+                profile.save(update_fields=dirty_fields)
+    instance._loaded_email = instance.email
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_is_changed(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_is_changed(sender, instance, **kwargs):
+    # the cached user carries its profile along
+    invalidate_cached_user(instance.user_id)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Dislike)
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Dislike)
+def vote_is_changed(sender, instance, created=False, **kwargs):
+    """
+    Log the vote for `manage.py apply_votes` to add to the article counters.
+    """
+    if kwargs['signal'] is post_save and not created:
+        return
+    change = 1 if created else -1
+    field = 'likes' if sender is Like else 'dislikes'
+    # a removed vote takes back what it added to the trending score
+    PendingVote.objects.create(article_id=instance.article_id, created=instance.created, **{field: change})
+
+
+@receiver(post_save, sender=Article)
+def article_is_saved(sender, instance, **kwargs):
+    AuthorStats.objects.refresh([instance.author_id])
+
+
+@receiver(post_delete, sender=Article)
+def article_is_deleted(sender, instance, **kwargs):
+    # the author may be getting deleted too, don't recreate their rollup
+    AuthorStats.objects.refresh([instance.author_id], create=False)
+
+
+@receiver(article_published)
+def articles_are_published(sender, articles, **kwargs):
+    # `publish_due` and the admin action publish with an UPDATE, which
+    # doesn't send `post_save`
+    AuthorStats.objects.refresh({article.author_id for article in articles})
@@ -0,0 +1,152 @@
+"""
+Related articles, precomputed.
+
+Published articles are turned into TF-IDF vectors over their title and
+content, and the `TOP_K` most similar articles of each are stored as
+`RelatedArticle` rows, so the detail page reads its neighbours with a
+single indexed query. The vectors are NumPy/SciPy sparse matrices.
+
+A rebuild re-ranks only the articles changed since their neighbours were
+computed, along with the articles a changed one enters or leaves the
+top-K of. It still reads every published article and every stored link:
+the vectors are computed over the whole corpus each time, so the word
+weights stay current. `rebuild(full=True)` re-ranks everything.
+"""
+import re
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from django.utils.html import strip_tags
+from scipy import sparse
+
+from .models import Article, RelatedArticle, chunks
+
+TOP_K = 5
+# titles say more about an article than any sentence of its content
+TITLE_WEIGHT = 3
+
+WORD = re.compile(r'[^\W\d_]{3,}')
+STOP_WORDS = frozenset("""
+    about above after again against all also and any are because been before being below
+    between both but can could did does doing down during each few for from further had has
+    have having her here hers herself him himself his how into its itself just more most
+    not now off once only other our ours out over own same she should some such than that
+    the their theirs them then there these they this those through too under until very
+    was were what when where which while who whom why will with would you your yours
+""".split())
+
+
+def tokenize(text):
+    return [word for word in WORD.findall(strip_tags(text).lower()) if word not in STOP_WORDS]
+
+
+def tfidf_matrix(documents):
+    """
+    L2-normalized TF-IDF vectors of `documents` (lists of words), one sparse
+    row each, with sublinear term frequencies and smoothed IDF.
+    """
+    vocabulary = {}
+    rows, columns, counts = [], [], []
+    for row, words in enumerate(documents):
+        frequencies = {}
+        for word in words:
+            column = vocabulary.setdefault(word, len(vocabulary))
+            frequencies[column] = frequencies.get(column, 0) + 1
+        rows += [row] * len(frequencies)
+        columns += frequencies.keys()
+        counts += frequencies.values()
+    shape = (len(documents), max(len(vocabulary), 1))
+    matrix = sparse.csr_matrix((np.array(counts, dtype=float), (rows, columns)), shape=shape)
+    matrix.data = 1 + np.log(matrix.data)
+    document_frequency = np.bincount(matrix.indices, minlength=shape[1])
+    idf = np.log((1 + shape[0]) / (1 + document_frequency)) + 1
+    matrix = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).dot(matrix).tocsr()
+
+
+def top_neighbors(similarities, row, exclude, k):
+    """
+    The `k` best (column, score) pairs of a sparse similarity row.
+    """
+    start, end = similarities.indptr[row], similarities.indptr[row + 1]
+    columns, scores = similarities.indices[start:end], similarities.data[start:end]
+    keep = (columns != exclude) & (scores > 0)
+    columns, scores = columns[keep], scores[keep]
+    if len(scores) > k:
+        best = np.argpartition(-scores, k)[:k]
+        columns, scores = columns[best], scores[best]
+    order = np.lexsort((columns, -scores))
+    return list(zip(columns[order].tolist(), scores[order].tolist()))
+
+
+def rebuild(full=False, k=TOP_K):
+    """
+    Bring the related articles up to date. Returns the number of articles
+    whose neighbours were recomputed.
+    """
+    now = timezone.now()
+    articles = list(Article.published.order_by('pk').values_list('pk', 'title', 'content', 'updated', 'related_updated'))
+    pks = [pk for pk, *_ in articles]
+    positions = {pk: position for position, pk in enumerate(pks)}
+
+    links = {}
+    for article_id, related_id, score in RelatedArticle.objects.values_list('article_id', 'related_id', 'score'):
+        links.setdefault(article_id, []).append((related_id, score))
+    # lists of articles no longer published, or pointing to one, are stale
+    gone = {article_id for article_id in links if article_id not in positions}
+    affected = {
+        article_id for article_id, related in links.items()
+        if article_id in positions and any(related_id not in positions for related_id, _ in related)
+    }
+
+    if full:
+        changed = set(pks)
+    else:
+        changed = {pk for pk, _, _, updated, indexed in articles if indexed is None or updated > indexed}
+    affected |= changed
+
+    if articles:
+        matrix = tfidf_matrix([tokenize(f'{title} ' * TITLE_WEIGHT + content) for _, title, content, *_ in articles])
+        if changed and not full:
+            affected |= entered_or_left(matrix, pks, positions, changed, links, k)
+        rows = sorted(positions[pk] for pk in affected)
+        similarities = matrix[rows].dot(matrix.T).tocsr() if rows else None
+        new_links = [
+            RelatedArticle(article_id=pks[row], related_id=pks[column], score=score, rank=rank)
+            for i, row in enumerate(rows)
+            for rank, (column, score) in enumerate(top_neighbors(similarities, i, row, k), 1)
+        ]
+    else:
+        new_links = []
+
+    with transaction.atomic():
+        for chunk in chunks(sorted(gone | affected)):
+            RelatedArticle.objects.filter(article_id__in=chunk).delete()
+        RelatedArticle.objects.bulk_create(new_links)
+        for chunk in chunks(sorted(affected)):
+            Article.objects.filter(pk__in=chunk).update(related_updated=now)
+    return len(affected)
+
+
+def entered_or_left(matrix, pks, positions, changed, links, k):
+    """
+    Unchanged articles whose neighbours may differ because of the changed
+    ones: those listing a changed article, and those a changed article is
+    now more similar to than their last neighbour (or that have room).
+    """
+    affected = set()
+    columns = sorted(positions[pk] for pk in changed)
+    similarities = matrix.dot(matrix[columns].T).tocsr()
+    best = np.asarray(similarities.max(axis=1).todense()).ravel()
+    for position, pk in enumerate(pks):
+        if pk in changed:
+            continue
+        related = links.get(pk, [])
+        if any(related_id in changed for related_id, _ in related):
+            affected.add(pk)
+        elif best[position] > 0 and (len(related) < k or best[position] > min(score for _, score in related)):
+            affected.add(pk)
+    return affected
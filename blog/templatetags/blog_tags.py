@@ -0,0 +1,31 @@
+from django import template
+
+register = template.Library()
+
+
+class ArticleRowsNode(template.Node):
+    def __init__(self, articles):
+        self.articles = articles
+
+    def render(self, context):
+        # look the row template up once per list instead of resolving an
+        # `{% include %}` for every article
+        row = context.template.engine.get_template('blog/article.html')
+        rows = []
+        for article in self.articles.resolve(context):
+            with context.push(article=article):
+                rows.append(row.render(context))
+        return ''.join(rows)
+
+
+@register.tag
+def article_rows(parser, token):
+    """
+    Render `blog/article.html` for every article in a list::
+
+        {% article_rows articles %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a single list of articles")
+    return ArticleRowsNode(parser.compile_filter(bits[1]))
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog.models import Article
+from blog.paginators import EstimatedCountPaginator
+
+
+class ArticleAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:blog_article_changelist')
+
+    def run_action(self, action, articles):
+        return self.client.post(self.url, {
+            'action': action,
+            '_selected_action': [article.pk for article in articles],
+        })
+
+    def test_changelist(self):
+        article = mixer.blend('blog.article')
+        response = self.client.get(self.url, {'author': article.author_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, article.title)
+
+    def test_search(self):
+        author = mixer.blend('auth.User', username='writer')
+        by_title = mixer.blend('blog.article', title='Python tips', slug='')
+        by_slug = mixer.blend('blog.article', title='Other', slug='python')
+        by_author = mixer.blend('blog.article', title='Third', author=author)
+        mixer.blend('blog.article', title='Learning Python', slug='')
+
+        def search(term):
+            response = self.client.get(self.url, {'q': term})
+            return set(response.context['cl'].result_list)
+        self.assertEqual(search('Python'), {by_title, by_slug})
+        self.assertEqual(search('python'), {by_title, by_slug})
+        self.assertEqual(search('PYTHON T'), {by_title})
+        self.assertEqual(search('writer'), {by_author})
+        self.assertEqual(search('Writer'), {by_author})
+
+    def test_publish_action(self):
+        draft = mixer.blend('blog.article')
+        published = mixer.blend('blog.article', publish=True)
+        pub_date = published.pub_date
+        self.run_action('publish_articles', [draft, published])
+        draft.refresh_from_db()
+        published.refresh_from_db()
+        self.assertTrue(draft.publish)
+        self.assertIsNotNone(draft.pub_date)
+        self.assertEqual(published.pub_date, pub_date)
+
+    def test_publish_action_publishes_scheduled_articles_now(self):
+        scheduled = mixer.blend('blog.article', publish=True, pub_date=timezone.now() + timedelta(days=1))
+        self.run_action('publish_articles', [scheduled])
+        self.assertTrue(Article.published.filter(pk=scheduled.pk).exists())
+
+    def test_unpublish_action(self):
+        article = mixer.blend('blog.article', publish=True)
+        self.run_action('unpublish_articles', [article])
+        article.refresh_from_db()
+        self.assertFalse(article.publish)
+        self.assertIsNone(article.pub_date)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_small_tables_are_counted_exactly(self):
+        mixer.cycle(3).blend('blog.article')
+        paginator = EstimatedCountPaginator(Article.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
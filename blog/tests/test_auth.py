@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from blog.email_authentication import EmailAuthBackend
+
+
+class EmailAuthBackendGetUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.backend = EmailAuthBackend()
+        self.user = mixer.blend('auth.User')
+
+    def test_user_is_loaded_with_profile(self):
+        user = self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user.profile
+
+    def test_user_is_served_from_cache(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.pk)
+        self.assertEqual(user, self.user)
+
+    def test_saving_user_invalidates_cache(self):
+        self.backend.get_user(self.user.pk)
+        self.user.first_name = 'Changed'
+        self.user.save()
+        user = self.backend.get_user(self.user.pk)
+        self.assertEqual(user.first_name, 'Changed')
+
+    def test_saving_profile_invalidates_cache(self):
+        self.backend.get_user(self.user.pk)
+        profile = self.user.profile
+        profile.full_name = 'Changed'
+        profile.save()
+        user = self.backend.get_user(self.user.pk)
+        self.assertEqual(user.profile.full_name, 'Changed')
+
+    def test_unknown_user(self):
+        self.assertIsNone(self.backend.get_user(0))
+
+
+class EmailAuthBackendAuthenticateTests(TestCase):
+    def setUp(self):
+        self.backend = EmailAuthBackend()
+        self.user = mixer.blend('auth.User', email='Author@Example.com')
+        self.user.set_password('secret')
+        self.user.save()
+
+    def test_login_is_case_insensitive(self):
+        user = self.backend.authenticate(None, username=' author@EXAMPLE.com', password='secret')
+        self.assertEqual(user, self.user)
+
+    def test_wrong_password(self):
+        user = self.backend.authenticate(None, username='author@example.com', password='wrong')
+        self.assertIsNone(user)
+
+    def test_unknown_email(self):
+        user = self.backend.authenticate(None, username='nobody@example.com', password='secret')
+        self.assertIsNone(user)
+
+    def test_empty_email(self):
+        mixer.blend('auth.User', email='')
+        mixer.blend('auth.User', email='')
+        self.assertIsNone(self.backend.authenticate(None, username='', password='secret'))
+
+    def test_duplicate_email_is_not_claimed_twice(self):
+        """
+        A second account with the same address can't log in by e-mail, and
+        doesn't break logins for the first one.
+        """
+        other = mixer.blend('auth.User', email='author@example.com')
+        self.assertIsNone(other.profile.login_email)
+        user = self.backend.authenticate(None, username='author@example.com', password='secret')
+        self.assertEqual(user, self.user)
+
+    def test_changing_email_updates_login_email(self):
+        self.user.email = 'New@Example.com'
+        self.user.save()
+        user = self.backend.authenticate(None, username='new@example.com', password='secret')
+        self.assertEqual(user, self.user)
+
+    def test_concurrent_claim_falls_back_to_no_login_email(self):
+        # the address was claimed between the check and the insert
+        with mock.patch('blog.signals.claimable_login_email', return_value='author@example.com'):
+            other = mixer.blend('auth.User', email='author@example.com')
+        self.assertIsNone(other.profile.login_email)
+        self.assertEqual(self.user.profile.login_email, 'author@example.com')
+
+
+class RegistrationTests(TestCase):
+    def test_email_must_be_unique(self):
+        mixer.blend('auth.User', email='Author@Example.com')
+        response = self.client.post(reverse('django_registration_register'), {
+            'username': 'newcomer',
+            'email': 'author@example.COM',
+            'password1': 'a long passphrase 42',
+            'password2': 'a long passphrase 42',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('email', response.context['form'].errors)
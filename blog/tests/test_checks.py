@@ -0,0 +1,48 @@
+from django.test import SimpleTestCase, override_settings
+
+from blog.checks import check_debug, check_performance_settings
+
+PRODUCTION_TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [('django.template.loaders.cached.Loader', ['django.template.loaders.filesystem.Loader'])],
+    },
+}]
+
+
+class PerformanceChecksTests(SimpleTestCase):
+    def ids(self, errors):
+        return {error.id for error in errors}
+
+    @override_settings(DEBUG=True)
+    def test_development_is_not_flagged(self):
+        self.assertEqual(check_performance_settings(None), [])
+
+    @override_settings(
+        DEBUG=False,
+        TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'OPTIONS': {'debug': True}}],
+        SESSION_ENGINE='django.contrib.sessions.backends.db',
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0}},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        MIDDLEWARE=[],
+    )
+    def test_hostile_settings_are_flagged(self):
+        self.assertEqual(
+            self.ids(check_performance_settings(None)),
+            {'blog.W001', 'blog.W002', 'blog.W003', 'blog.W005', 'blog.W006'}
+        )
+
+    @override_settings(
+        DEBUG=False,
+        TEMPLATES=PRODUCTION_TEMPLATES,
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 600}},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache'}},
+        MIDDLEWARE=['django.middleware.gzip.GZipMiddleware'],
+    )
+    def test_production_settings_pass(self):
+        self.assertEqual(check_performance_settings(None), [])
+
+    @override_settings(DEBUG=True)
+    def test_debug_is_flagged_on_deploy(self):
+        self.assertEqual(self.ids(check_debug(None)), {'blog.W007'})
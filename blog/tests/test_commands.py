@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog.models import Article, AuthorStats, Like, Dislike, Profile, TRENDING_EPOCH_LENGTH, chunks, trending_epoch
+
+
+class ImportExportCommandTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_file(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def import_content(self, kind, path, *args):
+        call_command('import_content', kind, path, *args, stdout=StringIO())
+
+    def test_import_users(self):
+        path = self.write_file('users.csv', (
+            'username,email,full_name\n'
+            'alice,Alice@example.com,Alice A\n'
+            'bob,bob@example.com,\n'
+        ))
+        self.import_content('users', path, '--batch-size', '1')
+        alice = User.objects.get(username='alice')
+        self.assertEqual(alice.profile.full_name, 'Alice A')
+        self.assertEqual(alice.profile.login_email, 'alice@example.com')
+        self.assertFalse(alice.has_usable_password())
+        self.assertEqual(Profile.objects.count(), 2)
+
+    def test_import_from_stdin_leaves_it_open(self):
+        stdin = StringIO('{"username": "alice"}\n')
+        with mock.patch('sys.stdin', stdin):
+            self.import_content('users', '-')
+        self.assertFalse(stdin.closed)
+        self.assertTrue(User.objects.filter(username='alice').exists())
+
+    def test_import_articles(self):
+        author = mixer.blend('auth.User', username='alice')
+        mixer.blend('blog.article', title='Existing')
+        records = [
+            {'title': 'First Post', 'author': 'alice', 'content': 'Hello', 'publish': True},
+            {'title': 'Draft', 'author': 'alice', 'content': 'Later'},
+            {'title': 'Existing', 'author': 'alice', 'content': 'Duplicate'},
+            {'title': 'Orphan', 'author': 'nobody', 'content': 'Unknown author'},
+        ]
+        path = self.write_file('articles.jsonl', '\n'.join(json.dumps(r) for r in records))
+        self.import_content('articles', path, '--batch-size', '2')
+        self.assertEqual(Article.objects.filter(author=author).count(), 2)
+        article = Article.objects.get(title='First Post')
+        self.assertEqual(article.slug, 'first-post')
+        self.assertIsNotNone(article.pub_date)
+        self.assertIsNone(Article.objects.get(title='Draft').pub_date)
+
+    def test_import_refreshes_author_stats_once(self):
+        author = mixer.blend('auth.User', username='alice')
+        records = [{'title': f'Post {i}', 'author': 'alice', 'publish': True} for i in range(3)]
+        path = self.write_file('articles.jsonl', '\n'.join(json.dumps(r) for r in records))
+        with mock.patch.object(AuthorStats.objects, 'refresh', wraps=AuthorStats.objects.refresh) as refresh:
+            self.import_content('articles', path, '--batch-size', '1')
+        refresh.assert_called_once_with({author.pk})
+        self.assertEqual(AuthorStats.objects.get(user=author).articles, 3)
+
+    def test_import_votes(self):
+        user = mixer.blend('auth.User', username='alice')
+        article = mixer.blend('blog.article', slug='post')
+        mixer.blend('blog.like', user=user, article=article)
+        path = self.write_file('votes.csv', (
+            'kind,user,article\n'
+            'like,alice,post\n'
+            'dislike,alice,post\n'
+            'dislike,alice,post\n'
+        ))
+        self.import_content('votes', path)
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(Dislike.objects.count(), 1)
+        self.assertEqual((article.likes, article.dislikes), (1, 1))
+
+    def test_import_looks_up_a_batch_in_chunks(self):
+        users = [mixer.blend('auth.User', username=f'user{i}') for i in range(3)]
+        articles = [mixer.blend('blog.article', slug=f'post{i}') for i in range(3)]
+        mixer.blend('blog.like', user=users[0], article=articles[0])
+        mixer.blend('blog.like', user=users[2], article=articles[1])
+        path = self.write_file('votes.csv', 'kind,user,article\n' + ''.join(
+            f'like,user{i},post{j}\n' for i in range(3) for j in range(3)
+        ))
+        with mock.patch('blog.bulk.chunks', lambda items, size=500: chunks(items, 2)):
+            self.import_content('votes', path)
+        self.assertEqual(Like.objects.count(), 9)
+        self.assertEqual(sorted(article.likes for article in articles), [3, 3, 3])
+
+    def test_export_round_trip(self):
+        mixer.blend('blog.article', title='Exported', publish=True)
+        out = StringIO()
+        call_command('export_content', 'articles', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), 1)
+        Article.objects.all().delete()
+
+        path = self.write_file('articles.jsonl', out.getvalue())
+        self.import_content('articles', path)
+        self.assertTrue(Article.published.filter(title='Exported').exists())
+
+    def test_export_csv(self):
+        mixer.blend('auth.User', username='alice')
+        path = os.path.join(self.tmpdir.name, 'users.csv')
+        call_command('export_content', 'users', path, stderr=StringIO())
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines[0].startswith('username,email'))
+        self.assertEqual(len(lines), 2)
+
+
+class PublishDueCommandTests(TestCase):
+    def test_publishes_due_articles(self):
+        article = mixer.blend('blog.article', publish=True, pub_date=timezone.now() + timedelta(seconds=1))
+        Article.objects.filter(pk=article.pk).update(pub_date=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command('publish_due', stdout=out)
+        self.assertIn(f'Published {article.slug}', out.getvalue())
+        self.assertTrue(Article.published.filter(pk=article.pk).exists())
+
+
+class ApplyVotesCommandTests(TestCase):
+    def test_applies_pending_votes(self):
+        article = mixer.blend('blog.article')
+        mixer.cycle(2).blend(Like, article=article)
+        out = StringIO()
+        call_command('apply_votes', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Applied 2 vote(s).')
+        article.refresh_from_db()
+        self.assertEqual(article.like_count, 2)
+
+
+class DecayTrendingCommandTests(TestCase):
+    def test_moves_scores_to_the_current_epoch(self):
+        article = mixer.blend('blog.article')
+        previous = trending_epoch(timezone.now()) - TRENDING_EPOCH_LENGTH
+        Article.objects.filter(pk=article.pk).update(trending_score=1, trending_updated=previous)
+        out = StringIO()
+        call_command('decay_trending', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Moved 1 trending score(s) to the current epoch.')
@@ -0,0 +1,65 @@
+import random
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from blog import loadtest
+
+FIXTURE = {
+    'slugs': [f'article-{i}' for i in range(100)],
+    'sessions': ['a', 'b', 'c'],
+    'cookie_name': 'sessionid',
+    'words': ['cache', 'query'],
+    'pages': 3,
+}
+
+
+class LoadTestTests(SimpleTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(loadtest.parse_mix('list=3, detail=1'), {'list': 3, 'detail': 1})
+        for mix in ('list=3,nope=1', 'list=x', 'list=-1', 'list=0'):
+            with self.assertRaises(ValueError):
+                loadtest.parse_mix(mix)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, 50), 50)
+        self.assertEqual(loadtest.percentile(values, 99), 99)
+        self.assertEqual(loadtest.percentile([7], 95), 7)
+        self.assertEqual(loadtest.percentile([], 95), 0)
+
+    def test_scenarios_are_repeatable(self):
+        def requests(seed):
+            rng = random.Random(seed)
+            return [loadtest.SCENARIOS[name](rng, FIXTURE) for name in loadtest.SCENARIOS for _ in range(20)]
+        self.assertEqual(requests(1), requests(1))
+        self.assertNotEqual(requests(1), requests(2))
+
+    def test_vote_burst_is_logged_in(self):
+        burst = loadtest.vote_burst(random.Random(0), FIXTURE)
+        self.assertEqual(len(burst), loadtest.VOTE_BURST)
+        self.assertEqual(len({path for _, path, _ in burst}), 1)
+        self.assertTrue(all(cookie.startswith('sessionid=') for _, _, cookie in burst))
+
+    def test_vote_burst_requests_overlap(self):
+        burst = loadtest.vote_burst(random.Random(0), FIXTURE)
+        # only returns once every request of the burst is in flight
+        in_flight = threading.Barrier(len(burst), timeout=5)
+
+        def fetch(port, path, cookie):
+            in_flight.wait()
+            return 302, 0.01
+        with mock.patch('blog.loadtest.fetch', fetch):
+            results = loadtest.fetch_together(8000, burst)
+        self.assertEqual(results, [('vote', 302, 0.01)] * len(burst))
+
+    def test_summarize(self):
+        samples = [('list', 200, 0.01), ('list', 500, 0.03), ('vote', 429, 0.02), ('vote', 0, 0.5)]
+        summary = loadtest.summarize(samples)
+        self.assertEqual(list(summary), ['list', 'vote', 'total'])
+        self.assertEqual(summary['list']['errors'], 1)
+        self.assertEqual(summary['vote']['throttled'], 1)
+        self.assertEqual(summary['vote']['errors'], 1)
+        self.assertEqual(summary['total']['requests'], 4)
+        self.assertEqual(summary['total']['p50'], 20)
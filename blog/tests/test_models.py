@@ -1,9 +1,19 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.utils import timezone
 from django.contrib.auth.models import User 
 from mixer.backend.django import mixer 
 from django.db.transaction import TransactionManagementError
 
-from blog.models import Like, Article
+from blog import revisions, sanitizer
+from blog.signals import article_published
+from blog.models import (
+    Like, Dislike, Article, ArticleRevision, AuthorStats, PendingVote, Profile,
+    TRENDING_EPOCH_LENGTH, trending_epoch, trending_weight,
+)
 
 class ArticleModelTests(TestCase):
     def test_published_article_model_manager(self):
@@ -76,3 +86,366 @@ class LikeModelTests(TestCase):
         total_likes = Like.objects.count()
         self.assertEqual(total_likes, 2)
 
+
+
+class ProfileMaintenanceTests(TestCase):
+    def test_system_updates_do_not_touch_profile(self):
+        """
+        Saves restricted to unrelated fields, like `last_login` on each
+        login, write nothing but the user row.
+        """
+        user = mixer.blend('auth.User')
+        user = User.objects.get(pk=user.pk)
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_unchanged_profile_is_not_saved(self):
+        user = User.objects.get(pk=mixer.blend('auth.User').pk)
+        user.profile
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_changed_profile_is_saved_with_user(self):
+        user = mixer.blend('auth.User')
+        user.profile.full_name = 'Changed'
+        user.save()
+        self.assertEqual(Profile.objects.get(user=user).full_name, 'Changed')
+
+    def test_create_for_users(self):
+        User.objects.bulk_create([
+            User(username='first', email='Shared@example.com'),
+            User(username='second', email='shared@example.com'),
+        ])
+        users = list(User.objects.filter(username__in=['first', 'second']).order_by('username'))
+        Profile.objects.create_for_users(users)
+        self.assertEqual(Profile.objects.get(user=users[0]).login_email, 'shared@example.com')
+        self.assertIsNone(Profile.objects.get(user=users[1]).login_email)
+
+
+class ArticleSlugTests(TestCase):
+    def test_slug_is_generated_from_title(self):
+        article = mixer.blend('blog.article', title='Hello World', slug='')
+        self.assertEqual(article.slug, 'hello-world')
+
+    def test_colliding_titles_get_unique_slugs(self):
+        first = mixer.blend('blog.article', title='Hello World', slug='')
+        second = mixer.blend('blog.article', title='Hello, World!', slug='')
+        third = mixer.blend('blog.article', title='Hello World?', slug='')
+        self.assertEqual(second.slug, 'hello-world-2')
+        self.assertEqual(third.slug, 'hello-world-3')
+
+    def test_unique_slug_is_a_single_query(self):
+        mixer.blend('blog.article', title='Hello World', slug='')
+        with self.assertNumQueries(1):
+            self.assertEqual(Article.unique_slug('Hello World'), 'hello-world-2')
+
+    def test_unique_slug_only_reads_its_own_candidates(self):
+        mixer.blend('blog.article', title='Post', slug='')
+        mixer.blend('blog.article', title='Poster', slug='')
+        mixer.blend('blog.article', title='Post 2', slug='')
+        with self.assertNumQueries(1) as queries:
+            self.assertEqual(Article.unique_slug('Post'), 'post-3')
+        sql = queries.captured_queries[0]['sql']
+        self.assertNotIn('LIKE', sql)
+        self.assertNotIn('ORDER BY', sql)
+
+    def test_renaming_records_old_slug(self):
+        article = mixer.blend('blog.article', title='Old Title', slug='')
+        article = Article.objects.get(pk=article.pk)
+        article.title = 'New Title'
+        article.save()
+        self.assertEqual(article.slug, 'new-title')
+        self.assertEqual(article.articleslugredirect_set.get().old_slug, 'old-title')
+
+    def test_reclaiming_old_slug_drops_redirect(self):
+        article = mixer.blend('blog.article', title='Old Title', slug='')
+        article.title = 'New Title'
+        article.save()
+        article.title = 'Old Title'
+        article.save()
+        self.assertEqual(article.slug, 'old-title')
+        self.assertEqual(
+            list(article.articleslugredirect_set.values_list('old_slug', flat=True)),
+            ['new-title']
+        )
+
+
+class ArticleRevisionTests(TestCase):
+    def edit(self, article, content):
+        article.content = content
+        article.save()
+
+    def test_revisions_rebuild_earlier_content(self):
+        article = mixer.blend('blog.article', content='one\ntwo\nthree\n')
+        self.edit(article, 'one\n2\nthree\n')
+        self.edit(article, 'zero\none\n2\nthree\nfour\n')
+        self.assertEqual(article.revisions.count(), 2)
+        older, old = article.revisions.order_by('pk')
+        self.assertEqual(old.get_content(), 'one\n2\nthree\n')
+        self.assertEqual(older.get_content(), 'one\ntwo\nthree\n')
+
+    def test_saving_without_content_change_adds_no_revision(self):
+        article = mixer.blend('blog.article')
+        article.title = 'A new title'
+        article.save()
+        self.assertFalse(ArticleRevision.objects.exists())
+
+    def test_revision_size_follows_the_change(self):
+        paragraphs = [f'Paragraph {n} of a long article about nothing in particular.\n' for n in range(500)]
+        article = mixer.blend('blog.article', content=''.join(paragraphs))
+        paragraphs[250] = paragraphs[250].replace('nothing', 'something')
+        self.edit(article, ''.join(paragraphs))
+        revision = article.revisions.get()
+        self.assertLess(len(revision.delta), 100)
+        start = article.content.index('something')
+        self.assertEqual(revisions.decompress(revision.delta), [[start, start + 4, 'no']])
+
+
+class RenderedContentTests(TestCase):
+    def test_content_is_rendered_on_save(self):
+        article = mixer.blend('blog.article', content='<p>Hello <script>x()</script><b>world</b></p>')
+        self.assertEqual(article.content_html, '<p>Hello <b>world</b></p>')
+        self.assertEqual(article.excerpt, 'Hello world')
+        self.assertEqual(article.content_hash, revisions.checksum(article.content))
+
+    def test_unchanged_content_is_not_rendered_again(self):
+        article = mixer.blend('blog.article', content='<p>Hello</p>')
+        article = Article.objects.get(pk=article.pk)
+        with mock.patch('blog.sanitizer.render', wraps=sanitizer.render) as render:
+            article.title = 'A new title'
+            article.save()
+            render.assert_not_called()
+            article.content = '<p>Bye</p>'
+            article.save()
+            render.assert_called_once_with('<p>Bye</p>')
+        self.assertEqual(Article.objects.get().content_html, '<p>Bye</p>')
+
+
+class DeltaTests(TestCase):
+    def test_diff_round_trip(self):
+        pairs = [
+            ('', 'new article'),
+            ('some text', ''),
+            ('a b c\nd e f\n', 'a x c\nd e f\ng\n'),
+            ('caf\u00e9 \U0001f600 smile', 'caf\u00e9 \U0001f600 grin'),
+        ]
+        for source, target in pairs:
+            self.assertEqual(revisions.apply_changes(source, revisions.diff(source, target)), target)
+            self.assertEqual(revisions.apply_changes(target, revisions.diff(target, source)), source)
+
+    def test_invalid_changes_are_rejected(self):
+        for changes in ([[3, 1, 'x']], [[0, 2, 'x'], [1, 3, 'y']], [[0, 99, '']], [[0, 1]], 'abc', None):
+            with self.assertRaises(revisions.InvalidChanges):
+                revisions.apply_changes('abcdef', changes)
+
+
+class ScheduledPublishingTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.published = []
+        article_published.connect(self.receive)
+
+    def tearDown(self):
+        article_published.disconnect(self.receive)
+
+    def receive(self, sender, articles, **kwargs):
+        self.published.extend(articles)
+
+    def test_future_pub_date_schedules_the_article(self):
+        article = mixer.blend('blog.article', publish=True, pub_date=self.now + timedelta(hours=1))
+        self.assertTrue(article.is_scheduled)
+        self.assertFalse(Article.published.exists())
+        self.assertEqual(self.published, [])
+
+    def test_editing_a_due_scheduled_article_publishes_it(self):
+        article = mixer.blend('blog.article', publish=True, pub_date=self.now + timedelta(hours=1))
+        # the date passes before `publish_due` runs
+        Article.objects.filter(pk=article.pk).update(pub_date=self.now - timedelta(minutes=1))
+        article = Article.objects.get(pk=article.pk)
+        self.assertTrue(article.is_scheduled)
+        article.content = 'Edited'
+        article.save()
+        article.refresh_from_db()
+        self.assertTrue(article.publish)
+        self.assertFalse(article.scheduled)
+        self.assertEqual(article.pub_date, self.now - timedelta(minutes=1))
+        self.assertEqual(self.published, [article])
+
+    def test_clearing_the_date_unschedules(self):
+        article = mixer.blend('blog.article', publish=True, pub_date=self.now + timedelta(hours=1))
+        article.pub_date = None
+        article.save()
+        self.assertFalse(article.scheduled)
+        self.assertFalse(article.publish)
+        self.assertIsNone(Article.objects.next_due())
+
+    def test_unpublishing_clears_the_date(self):
+        article = mixer.blend('blog.article', publish=True)
+        article.publish = False
+        article.save()
+        self.assertFalse(article.scheduled)
+        self.assertIsNone(article.pub_date)
+
+    def test_publishing_sends_the_signal_once(self):
+        article = mixer.blend('blog.article', publish=True)
+        article.save()
+        self.assertEqual(self.published, [article])
+
+    def test_publish_due_flips_only_due_articles(self):
+        due = mixer.blend('blog.article', publish=True, pub_date=self.now + timedelta(minutes=5))
+        later = mixer.blend('blog.article', publish=True, pub_date=self.now + timedelta(days=1))
+        mixer.blend('blog.article', publish=False)
+        # the select and the update in a savepoint, then the author rollup
+        # refreshed by the signal
+        with self.assertNumQueries(9):
+            published = Article.objects.publish_due(now=self.now + timedelta(minutes=10))
+        self.assertEqual(published, [due])
+        self.assertEqual(self.published, [due])
+        self.assertEqual(Article.objects.next_due(), later.pub_date)
+        due.refresh_from_db()
+        self.assertTrue(due.publish)
+
+
+class VoteLogTests(TestCase):
+    def test_votes_are_counted_before_and_after_applying(self):
+        article = mixer.blend('blog.article', publish=True)
+        mixer.cycle(3).blend(Like, article=article)
+        mixer.blend(Dislike, article=article)
+        Like.objects.filter(article=article).first().delete()
+        self.assertEqual(PendingVote.objects.count(), 5)
+        self.assertEqual((article.likes, article.dislikes), (2, 1))
+
+        self.assertEqual(PendingVote.objects.apply(batch_size=2), 5)
+        self.assertFalse(PendingVote.objects.exists())
+        article = Article.objects.with_vote_counts().get()
+        self.assertEqual((article.like_count, article.dislike_count), (2, 1))
+        self.assertEqual((article.num_likes, article.num_dislikes), (2, 1))
+
+    def test_rows_claimed_by_another_run_are_not_applied(self):
+        article = mixer.blend('blog.article', publish=True)
+        mixer.cycle(3).blend(Like, article=article)
+        delete = QuerySet.delete
+        calls = []
+
+        def claim_after_another_run(queryset):
+            if not calls:
+                # another run claims one of the rows in the meantime
+                delete(PendingVote.objects.filter(pk=PendingVote.objects.order_by('pk').first().pk))
+            calls.append(queryset)
+            return delete(queryset)
+
+        with mock.patch.object(QuerySet, 'delete', claim_after_another_run):
+            self.assertEqual(PendingVote.objects.apply(), 3)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Article.objects.get().like_count, 3)
+
+    def test_votes_of_deleted_articles_are_dropped(self):
+        article = mixer.blend('blog.article')
+        mixer.blend(Like, article=article)
+        article.delete()
+        self.assertEqual(PendingVote.objects.apply(), 2)
+        self.assertFalse(PendingVote.objects.exists())
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.epoch = trending_epoch(self.now)
+
+    def score_now(self, article):
+        # the stored score in votes cast now
+        article.refresh_from_db()
+        return article.trending_score / trending_weight(self.now, article.trending_updated or self.epoch)
+
+    def test_recent_votes_weigh_more(self):
+        old = mixer.blend('blog.article', publish=True)
+        new = mixer.blend('blog.article', publish=True)
+        mixer.cycle(3).blend(Like, article=old, created=self.now - timedelta(hours=48))
+        mixer.blend(Like, article=new)
+        mixer.blend(Dislike, article=new, created=self.now - timedelta(hours=24))
+        PendingVote.objects.apply()
+        self.assertAlmostEqual(self.score_now(old), 0.75, places=3)
+        self.assertAlmostEqual(self.score_now(new), 0.5, places=3)
+
+    def test_removed_vote_takes_back_its_weight(self):
+        article = mixer.blend('blog.article')
+        like = mixer.blend(Like, article=article, created=self.now - timedelta(hours=12))
+        PendingVote.objects.apply()
+        like.delete()
+        PendingVote.objects.apply()
+        self.assertAlmostEqual(self.score_now(article), 0, places=6)
+
+    def test_scores_compare_as_stored(self):
+        stale, fresh, faded = mixer.cycle(3).blend('blog.article', publish=True)
+        # applied by separate runs, 2 likes two half-lives ago are 0.5 now,
+        # less than a fresh like; a like 10 half-lives ago has faded
+        mixer.cycle(2).blend(Like, article=stale, created=self.now - timedelta(hours=48))
+        mixer.blend(Like, article=faded, created=self.now - timedelta(hours=240))
+        PendingVote.objects.apply()
+        mixer.blend(Like, article=fresh, created=self.now)
+        PendingVote.objects.apply()
+        with self.assertNumQueries(1):
+            self.assertEqual(list(Article.published.trending(now=self.now)), [fresh, stale])
+
+    def test_rebase_moves_scores_to_the_current_epoch(self):
+        fading = mixer.blend('blog.article')
+        faded = mixer.blend('blog.article')
+        # a day before the epoch, so worth half as much relative to it
+        stamp = self.epoch - timedelta(hours=24)
+        for article, score in ((fading, 2), (faded, 0.01)):
+            Article.objects.filter(pk=article.pk).update(
+                trending_score=score * trending_weight(self.now, self.epoch), trending_updated=stamp)
+        self.assertEqual(Article.objects.rebase_trending(now=self.now), 2)
+        self.assertAlmostEqual(self.score_now(fading), 1)
+        self.assertEqual(fading.trending_updated, self.epoch)
+        faded.refresh_from_db()
+        self.assertEqual((faded.trending_score, faded.trending_updated), (0, None))
+
+    def test_first_run_of_an_epoch_rebases(self):
+        earlier = mixer.blend('blog.article', publish=True)
+        voted = mixer.blend('blog.article', publish=True)
+        previous = self.epoch - TRENDING_EPOCH_LENGTH
+        Article.objects.filter(pk=earlier.pk).update(
+            trending_score=trending_weight(self.now, previous), trending_updated=previous)
+        mixer.blend(Like, article=voted)
+        PendingVote.objects.apply()
+        self.assertAlmostEqual(self.score_now(earlier), 1)
+        self.assertEqual(earlier.trending_updated, self.epoch)
+
+
+class AuthorStatsTests(TestCase):
+    def setUp(self):
+        self.author = mixer.blend(User)
+
+    def stats(self):
+        stats = AuthorStats.objects.get(user=self.author)
+        return stats.articles, stats.likes, stats.dislikes
+
+    def test_rollup_follows_articles_and_votes(self):
+        article = mixer.blend('blog.article', author=self.author, publish=True)
+        mixer.blend('blog.article', author=self.author, publish=False)
+        self.assertEqual(self.stats(), (1, 0, 0))
+        self.assertEqual(AuthorStats.objects.get().latest_pub_date, article.pub_date)
+
+        mixer.cycle(2).blend(Like, article=article)
+        mixer.blend(Dislike, article=article)
+        PendingVote.objects.apply()
+        self.assertEqual(self.stats(), (1, 2, 1))
+
+        article.publish = False
+        article.save()
+        self.assertEqual(self.stats(), (0, 0, 0))
+
+    def test_scheduled_articles_count_once_published(self):
+        scheduled = mixer.blend('blog.article', author=self.author, publish=True,
+                                pub_date=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(self.stats(), (0, 0, 0))
+        # the date comes
+        Article.objects.filter(pk=scheduled.pk).update(pub_date=timezone.now() - timedelta(seconds=1))
+        Article.objects.publish_due()
+        self.assertEqual(self.stats(), (1, 0, 0))
+
+    def test_deleting_the_author(self):
+        mixer.blend('blog.article', author=self.author, publish=True)
+        self.author.delete()
+        self.assertFalse(AuthorStats.objects.exists())
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from blog.ratelimit import hit, parse_rate
+
+
+class HitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('30/m'), (30, 60))
+        self.assertEqual(parse_rate('5/second'), (5, 1))
+
+    def test_limit_within_a_window(self):
+        results = [hit('test', 3, 60, now=600 + n) for n in range(4)]
+        self.assertEqual(results[:3], [0, 0, 0])
+        self.assertGreater(results[3], 0)
+
+    def test_previous_window_slides_out(self):
+        for n in range(3):
+            hit('test', 3, 60, now=600 + n)
+        # halfway through the next window, half of the previous requests count
+        self.assertEqual(hit('test', 3, 60, now=690), 0)
+        self.assertGreater(hit('test', 3, 60, now=691), 0)
+
+    def test_retry_after_is_when_the_request_would_pass(self):
+        for n in range(3):
+            hit('test', 3, 60, now=600)
+        retry_after = hit('test', 3, 60, now=600)
+        self.assertEqual(retry_after, 75)
+
+
+@override_settings(BLOG_RATELIMITS={'vote': '2/m', 'search': '1/m'})
+class RateLimitedViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_votes_are_limited_per_user(self):
+        article = mixer.blend('blog.article', publish=True)
+        self.client.force_login(mixer.blend('auth.User'))
+        url = reverse('like_article', args=(article.slug,))
+        responses = [self.client.get(url) for _ in range(3)]
+        self.assertEqual([r.status_code for r in responses], [200, 200, 429])
+        self.assertIn('Retry-After', responses[2])
+        # another user has a bucket of their own
+        self.client.force_login(mixer.blend('auth.User'))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_only_searches_are_limited(self):
+        url = reverse('article_list')
+        self.assertEqual(self.client.get(url, {'query': 'django'}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'query': 'python'}).status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,43 @@
+from django.test import SimpleTestCase
+
+from blog import sanitizer
+
+
+class SanitizerTests(SimpleTestCase):
+    def render(self, content):
+        return sanitizer.render(content)[0]
+
+    def test_allowed_markup_is_kept(self):
+        html = '<h2>Title</h2><p><strong>Bold</strong> and <a href="https://example.com" title="x">a link</a></p>'
+        self.assertEqual(
+            self.render(html),
+            '<h2>Title</h2><p><strong>Bold</strong> and '
+            '<a href="https://example.com" title="x" rel="nofollow">a link</a></p>',
+        )
+
+    def test_scripts_and_unknown_attributes_are_dropped(self):
+        html = '<p onclick="steal()" style="color: red">Hi<script>alert("<p>")</script></p><style>p {}</style>'
+        self.assertEqual(self.render(html), '<p>Hi</p>')
+
+    def test_unknown_tags_keep_their_text(self):
+        self.assertEqual(self.render('<form><p>Text</p><input value="x"></form>'), '<p>Text</p>')
+
+    def test_unsafe_urls_are_dropped(self):
+        for url in ('javascript:alert(1)', 'JaVa\tScRiPt:alert(1)', '&#106;avascript:alert(1)', 'data:text/html,x'):
+            self.assertEqual(self.render(f'<a href="{url}">x</a>'), '<a rel="nofollow">x</a>')
+        self.assertEqual(self.render('<img src="/media/a.png" alt="A">'), '<img src="/media/a.png" alt="A">')
+
+    def test_text_is_escaped_and_tags_are_closed(self):
+        self.assertEqual(self.render('<p><em>1 &lt; 2 &amp; <b>3'), '<p><em>1 &lt; 2 &amp; <b>3</b></em></p>')
+        self.assertEqual(self.render('<ul><li>one</ul>'), '<ul><li>one</li></ul>')
+        self.assertEqual(self.render('<img src="x" alt="&quot;>">'), '<img src="x" alt="&quot;&gt;">')
+
+    def test_plain_text_becomes_paragraphs(self):
+        html, excerpt = sanitizer.render('First line\nsecond & last\n\nNext paragraph')
+        self.assertEqual(html, '<p>First line<br>second &amp; last</p>\n\n<p>Next paragraph</p>')
+        self.assertEqual(excerpt, 'First line second & last Next paragraph')
+
+    def test_excerpt_is_text(self):
+        _, excerpt = sanitizer.render('<h2>Title</h2><p>Some <b>bold</b> text</p><script>x()</script>' + 'word ' * 100)
+        self.assertTrue(excerpt.startswith('Title Some bold text word'))
+        self.assertEqual(len(excerpt), sanitizer.EXCERPT_LENGTH)
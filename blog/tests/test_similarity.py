@@ -0,0 +1,83 @@
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from blog import counters, similarity
+from blog.models import RelatedArticle
+
+
+class SimilarityMatrixTests(SimpleTestCase):
+    def test_vectors_are_normalized_and_weighted(self):
+        # columns in order of first appearance: python, generators, bread
+        matrix = similarity.tfidf_matrix([['python', 'generators'], ['python', 'bread'], []])
+        norms = matrix.multiply(matrix).sum(axis=1)
+        self.assertAlmostEqual(float(norms[0]), 1)
+        self.assertAlmostEqual(float(norms[1]), 1)
+        self.assertEqual(matrix[2].nnz, 0)
+        # a word in fewer documents weighs more
+        python, generators, _ = matrix[0].toarray().ravel()
+        self.assertGreater(generators, python)
+
+    def test_top_neighbors(self):
+        matrix = similarity.tfidf_matrix([['a1', 'b1'], ['a1', 'b1'], ['a1', 'c1'], ['d1']])
+        similarities = matrix.dot(matrix.T).tocsr()
+        neighbors = similarity.top_neighbors(similarities, 0, 0, k=2)
+        self.assertEqual([column for column, _ in neighbors], [1, 2])
+        self.assertGreater(neighbors[0][1], neighbors[1][1])
+        self.assertEqual(similarity.top_neighbors(similarities, 3, 3, k=2), [])
+
+
+class RelatedArticlesTests(TestCase):
+    def setUp(self):
+        self.python = mixer.blend(
+            'blog.article', publish=True, title='Python generators',
+            content='Generators in Python yield values lazily, iterators and generators.')
+        self.iterators = mixer.blend(
+            'blog.article', publish=True, title='Python iterators',
+            content='Iterators in Python implement the iterator protocol, like generators.')
+        self.bread = mixer.blend(
+            'blog.article', publish=True, title='Baking bread',
+            content='Bread needs flour, water, yeast and an oven.')
+        self.cake = mixer.blend(
+            'blog.article', publish=True, title='Baking a cake',
+            content='A cake needs flour, sugar, eggs and an oven.')
+
+    def test_rebuild_ranks_similar_articles_first(self):
+        self.assertEqual(similarity.rebuild(), 4)
+        self.assertEqual(self.python.get_related_articles()[0], self.iterators)
+        self.assertEqual(self.cake.get_related_articles()[0], self.bread)
+        self.assertNotIn(self.cake, self.python.get_related_articles())
+
+    def test_rebuild_reranks_only_changed_articles(self):
+        similarity.rebuild()
+        self.assertEqual(similarity.rebuild(), 0)
+        self.bread.content = 'Sourdough bread with flour and water.'
+        self.bread.save()
+        # the bread article and the cake article that lists it
+        self.assertEqual(similarity.rebuild(), 2)
+
+    def test_new_article_enters_the_lists_of_unchanged_ones(self):
+        similarity.rebuild()
+        pastry = mixer.blend(
+            'blog.article', publish=True, title='Baking bread and cake',
+            content='Bread and cake need flour, an oven, yeast, sugar and eggs.')
+        # the new article, and the two baking articles it is now closest to
+        self.assertEqual(similarity.rebuild(), 3)
+        self.assertEqual(self.bread.get_related_articles()[0], pastry)
+        self.assertEqual(self.cake.get_related_articles()[0], pastry)
+
+    def test_unpublished_articles_are_dropped(self):
+        similarity.rebuild()
+        self.iterators.publish = False
+        self.iterators.save()
+        self.assertNotIn(self.iterators, self.python.get_related_articles())
+        similarity.rebuild()
+        self.assertFalse(RelatedArticle.objects.filter(related=self.iterators).exists())
+        self.assertFalse(RelatedArticle.objects.filter(article=self.iterators).exists())
+
+    def test_detail_view_reads_related_articles(self):
+        similarity.rebuild()
+        self.addCleanup(counters.flush_views)
+        response = self.client.get(reverse('article_detail', args=(self.python.slug,)))
+        self.assertEqual(response.context['related_articles'][0], self.iterators)
+        self.assertContains(response, 'Related articles')
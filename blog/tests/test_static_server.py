@@ -0,0 +1,73 @@
+import gzip
+import json
+import os
+import tempfile
+from wsgiref.util import setup_testing_defaults
+
+from django.test import SimpleTestCase
+
+from blogger.static_server import StaticFilesMiddleware
+
+
+def fallback_app(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'not static']
+
+
+class StaticFilesMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        css = b'body { color: green; }' * 50
+        self.write('css/style.css', css)
+        self.write('css/style.0123456789ab.css', css)
+        self.write('css/style.0123456789ab.css.gz', gzip.compress(css))
+        self.write('staticfiles.json', json.dumps({
+            'paths': {'css/style.css': 'css/style.0123456789ab.css'}, 'version': '1.0',
+        }).encode())
+        self.app = StaticFilesMiddleware(fallback_app, self.root.name, '/static/')
+
+    def tearDown(self):
+        self.root.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.root.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def get(self, path, **headers):
+        environ = {'PATH_INFO': path}
+        setup_testing_defaults(environ)
+        environ.update(headers)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+        response['body'] = b''.join(self.app(environ, start_response))
+        return response
+
+    def test_hashed_file_is_cached_forever(self):
+        response = self.get('/static/css/style.0123456789ab.css')
+        self.assertEqual(response['status'], '200 OK')
+        self.assertIn('immutable', response['headers']['Cache-Control'])
+        self.assertEqual(response['headers']['Vary'], 'Accept-Encoding')
+
+    def test_unhashed_file_is_revalidated(self):
+        response = self.get('/static/css/style.css')
+        self.assertEqual(response['headers']['Cache-Control'], 'public, max-age=60')
+
+    def test_compressed_variant(self):
+        response = self.get('/static/css/style.0123456789ab.css', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response['body']), b'body { color: green; }' * 50)
+
+    def test_not_modified(self):
+        etag = self.get('/static/css/style.css')['headers']['ETag']
+        response = self.get('/static/css/style.css', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response['status'], '304 Not Modified')
+        self.assertEqual(response['body'], b'')
+
+    def test_other_paths_reach_the_application(self):
+        self.assertEqual(self.get('/static/missing.css')['body'], b'not static')
+        self.assertEqual(self.get('/static/staticfiles.json')['body'], b'not static')
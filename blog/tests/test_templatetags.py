@@ -0,0 +1,37 @@
+from django.contrib.auth.models import AnonymousUser
+from django.template import engines
+from django.test import RequestFactory, TestCase
+from mixer.backend.django import mixer
+
+from blog.models import Article
+from blog.profiling import TemplateProfiler
+
+
+class ArticleRowsTagTests(TestCase):
+    def render(self, source, **context):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        return engines['django'].from_string(source).render(dict(context, request=request))
+
+    def test_matches_include_loop(self):
+        mixer.cycle(3).blend('blog.article', publish=True)
+        articles = list(Article.published.with_vote_counts())
+        with_tag = self.render('{% load blog_tags %}{% article_rows articles %}', articles=articles)
+        with_include = self.render(
+            "{% for article in articles %}{% include 'blog/article.html' %}{% endfor %}",
+            articles=articles,
+        )
+        self.assertEqual(with_tag, with_include)
+        for article in articles:
+            self.assertIn(article.title.title(), with_tag)
+
+    def test_profiler_counts_rows(self):
+        articles = list(mixer.cycle(2).blend('blog.article', publish=True))
+        with TemplateProfiler() as profiler:
+            self.render(
+                "{% for article in articles %}{% include 'blog/article.html' %}{% endfor %}",
+                articles=articles,
+            )
+        self.assertEqual(profiler.templates['blog/article.html'].calls, 2)
+        self.assertEqual(profiler.includes['blog/article.html'].calls, 2)
+        self.assertIn('blog/article.html', profiler.report())
@@ -1,8 +1,16 @@
+import json
+from importlib import reload
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from mixer.backend.django import mixer
 
-from blog.models import Article, Profile 
+from blog import counters, revisions, sanitizer
+from blog.models import Article, ArticleAutosave, Profile, trending_epoch, trending_weight 
 
 
 class ArticleListViewTests(TestCase):
@@ -53,7 +61,47 @@ class ArticleListViewTests(TestCase):
         )        
 
 
+class PopularArticlesViewTests(TestCase):
+    def test_importing_views_runs_no_queries(self):
+        import blog.views
+        mixer.cycle(3).blend('blog.like', article__publish=True)
+        with self.assertNumQueries(0):
+            reload(blog.views)
+
+    def test_liked_articles_ranked_by_popularity(self):
+        liked = mixer.blend('blog.article', publish=True)
+        loved = mixer.blend('blog.article', publish=True)
+        mixed = mixer.blend('blog.article', publish=True)
+        mixer.blend('blog.article', publish=True)    # no likes
+        mixer.cycle(1).blend('blog.like', article=liked)
+        mixer.cycle(3).blend('blog.like', article=loved)
+        mixer.cycle(2).blend('blog.like', article=mixed)
+        mixer.cycle(2).blend('blog.dislike', article=mixed)
+        response = self.client.get(reverse('popular_articles'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['articles']), [loved, liked, mixed])
+
+
+class TrendingArticlesViewTests(TestCase):
+    def test_articles_ordered_by_trending_score(self):
+        cold, warm, hot = mixer.cycle(3).blend('blog.article', publish=True)
+        now = timezone.now()
+        epoch = trending_epoch(now)
+        for article, score in ((cold, 0), (warm, 0.5), (hot, 2)):
+            Article.objects.filter(pk=article.pk).update(
+                trending_score=score * trending_weight(now, epoch), trending_updated=epoch)
+        response = self.client.get(reverse('trending_articles'))
+        self.assertContains(response, 'Trending Articles')
+        self.assertEqual(list(response.context['articles']), [hot, warm])
+
+
 class ArticleDetailViewTests(TestCase):
+    def setUp(self):
+        # views buffered by earlier tests belong to rolled back articles
+        counters.flush_views()
+        # and these to this test's, write them before it rolls back
+        self.addCleanup(counters.flush_views)
+
     def test_unpublished_article(self):
         """
         HTTP 404 Not Found is raised when a detail page for an 
@@ -76,6 +124,59 @@ class ArticleDetailViewTests(TestCase):
         self.assertContains(response, article.title)
         self.assertTemplateUsed(response, 'blog/article_detail.html')
 
+    def test_detail_page_shows_the_stored_rendering(self):
+        article = mixer.blend('blog.article', publish=True, content='<p>Safe<script>alert(1)</script></p>')
+        with mock.patch('blog.sanitizer.Sanitizer.feed') as feed:
+            response = self.client.get(reverse('article_detail', args=(article.slug, )))
+        feed.assert_not_called()
+        self.assertContains(response, '<p>Safe</p>', html=True)
+        self.assertNotContains(response, 'alert(1)')
+
+    def test_detail_page_counts_views(self):
+        article = mixer.blend('blog.article', publish=True)
+        url = reverse('article_detail', args=(article.slug, ))
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.context['article'].views, 2)
+        article.refresh_from_db()
+        self.assertEqual(article.views, 0)
+        counters.flush_views()
+        article.refresh_from_db()
+        self.assertEqual(article.views, 2)
+
+    def test_views_are_flushed_in_batches(self):
+        first, second = mixer.cycle(2).blend('blog.article', publish=True, views=5)
+        counters.count_view(first.pk, now=0)
+        counters.count_view(second.pk, now=0)
+        counters.count_view(first.pk, now=0)
+        # one UPDATE per distinct count, plus the savepoint and its release
+        with self.assertNumQueries(4):
+            self.assertEqual(counters.flush_views(now=0), 3)
+        self.assertEqual(
+            dict(Article.objects.values_list('pk', 'views')), {first.pk: 7, second.pk: 6},
+        )
+        counters.count_view(first.pk, now=counters.flush_interval())
+        first.refresh_from_db()
+        self.assertEqual(first.views, 8)
+
+    def test_idle_worker_flushes_views_on_a_timer(self):
+        article = mixer.blend('blog.article', publish=True)
+        with mock.patch('threading.Timer') as timer:
+            counters.count_view(article.pk)
+            counters.count_view(article.pk)
+        timer.assert_called_once_with(counters.flush_interval(), counters.flush_later)
+        with mock.patch('blog.counters.connection'):
+            counters.flush_later()
+        article.refresh_from_db()
+        self.assertEqual(article.views, 2)
+
+    def test_renamed_article_redirects(self):
+        article = mixer.blend('blog.article', title='Old Title', slug='', publish=True)
+        article.title = 'New Title'
+        article.save()
+        response = self.client.get(reverse('article_detail', args=('old-title', )))
+        self.assertRedirects(response, article.get_absolute_url(), status_code=301)
+
     def test_detail_page_displays_profile_of_article_author(self):
         article = mixer.blend('blog.article', publish=True)
         url = reverse('article_detail', args=(article.slug, ))
@@ -124,6 +225,44 @@ class DashboardViewTests(TestCase):
         self.assertContains(response, article4.title)
         self.assertContains(response, article5.title)
 
+    def test_dashboard_is_paginated(self):
+        user = mixer.blend('auth.User')
+        mixer.cycle(12).blend('blog.article', author=user)
+        self.client.force_login(user)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(len(response.context['articles']), 10)
+        response = self.client.get(reverse('dashboard') + '?page=2')
+        self.assertEqual(len(response.context['articles']), 2)
+
+    def test_dashboard_query_count_does_not_grow_with_articles(self):
+        def dashboard_queries(user):
+            self.client.force_login(user)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('dashboard'))
+            return len(queries)
+
+        reader = mixer.blend('auth.User')
+        few, many = mixer.blend('auth.User'), mixer.blend('auth.User')
+        for article in mixer.cycle(2).blend('blog.article', author=few, publish=True):
+            mixer.blend('blog.like', user=reader, article=article)
+        for article in mixer.cycle(10).blend('blog.article', author=many, publish=True):
+            mixer.blend('blog.like', user=reader, article=article)
+        self.assertEqual(dashboard_queries(few), dashboard_queries(many))
+
+    def test_dashboard_stats(self):
+        user = mixer.blend('auth.User')
+        reader = mixer.blend('auth.User')
+        published = mixer.blend('blog.article', author=user, publish=True, views=5)
+        mixer.blend('blog.article', author=user, views=1)
+        mixer.blend('blog.like', user=user, article=published)
+        mixer.blend('blog.like', user=reader, article=published)
+        mixer.blend('blog.dislike', user=reader, article=published)
+        self.client.force_login(user)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['stats'], {
+            'articles': 2, 'drafts': 1, 'views': 6, 'likes': 2, 'dislikes': 1,
+        })
+
     def test_dashboard_displays_user_profile(self):
         user = mixer.blend('auth.User')
         self.client.force_login(user)
@@ -238,6 +377,58 @@ class UpdateArticleViewTests(TestCase):
         self.assertEqual(updated_article.content, 'Updated content')
 
 
+class AutosaveViewTests(TestCase):
+    def setUp(self):
+        self.article = mixer.blend('blog.article', content='Hello world\r\nBye\r\n')
+        self.client.force_login(self.article.author)
+        self.url = reverse('article_autosave', args=(self.article.slug,))
+
+    def autosave(self, data):
+        return self.client.post(self.url, json.dumps(data), content_type='application/json')
+
+    def test_changes_are_applied_to_the_edited_text(self):
+        base = revisions.checksum('Hello world\nBye\n')
+        response = self.autosave({'checksum': base, 'changes': [[6, 11, 'there']]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.article.autosave.content, 'Hello there\nBye\n')
+        response = self.autosave({'checksum': response.json()['checksum'], 'changes': [[12, 15, 'Ciao']]})
+        self.assertEqual(ArticleAutosave.objects.get().content, 'Hello there\nCiao\n')
+
+    def test_stale_checksum_is_a_conflict(self):
+        response = self.autosave({'checksum': 'stale', 'changes': [[0, 0, 'x']]})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['checksum'], revisions.checksum('Hello world\nBye\n'))
+        response = self.autosave({'content': 'Resent'})
+        self.assertEqual(response.json()['checksum'], revisions.checksum('Resent'))
+
+    def test_only_the_author_can_autosave(self):
+        self.client.force_login(mixer.blend('auth.User'))
+        self.assertEqual(self.autosave({'content': 'x'}).status_code, 404)
+
+    def test_invalid_changes(self):
+        response = self.autosave({'checksum': revisions.checksum('Hello world\nBye\n'), 'changes': [[5, 1, '']]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_edit_page_restores_and_saving_discards_the_draft(self):
+        self.autosave({'content': 'Draft content'})
+        update_url = reverse('article_update', args=(self.article.slug,))
+        response = self.client.get(update_url)
+        self.assertContains(response, 'Draft content')
+        self.assertEqual(response.context['autosave_checksum'], revisions.checksum('Draft content'))
+        self.client.post(update_url, {'title': self.article.title, 'content': 'Final content'})
+        self.assertFalse(ArticleAutosave.objects.exists())
+        self.assertEqual(Article.objects.get().revisions.get().get_content(), 'Hello world\r\nBye\r\n')
+
+    def test_draft_preview_is_rendered_once(self):
+        self.autosave({'content': '<p>Draft <b>preview</b><script>x()</script></p>'})
+        update_url = reverse('article_update', args=(self.article.slug,))
+        with mock.patch('blog.sanitizer.render', wraps=sanitizer.render) as render:
+            response = self.client.get(update_url)
+            self.client.get(update_url)
+        render.assert_called_once()
+        self.assertEqual(response.context['preview'], '<p>Draft <b>preview</b></p>')
+
+
 class UserPageViewTests(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -264,6 +455,24 @@ class UserPageViewTests(TestCase):
             self.user.article_set.filter(publish=True)
         )
 
+    def test_page_queries_do_not_grow_with_articles(self):
+        def page_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+        mixer.cycle(2).blend('blog.article', author=self.user, publish=True)
+        few = page_queries()
+        mixer.cycle(25).blend('blog.article', author=self.user, publish=True)
+        self.assertEqual(page_queries(), few)
+
+    def test_page_is_paginated_with_rollup_count(self):
+        mixer.cycle(12).blend('blog.article', author=self.user, publish=True)
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(response.context['paginator'].num_pages, 2)
+        self.assertEqual(len(response.context['user_articles']), 2)
+        self.assertEqual(response.context['article_count'], 12)
+
 
 class LikeViewTests(TestCase):
 
@@ -304,6 +513,19 @@ class LikeViewTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(article.like_set.count(), 0)
 
+    def test_double_click_keeps_one_like(self):
+        user = mixer.blend('auth.User')
+        self.client.force_login(user)
+        article = mixer.blend('blog.article', publish=True)
+        mixer.blend('blog.like', user=user, article=article)
+        url = reverse('like_article', args=(article.slug, ))
+        # the other request's like lands between this one's delete and insert
+        with mock.patch('django.db.models.query.QuerySet.delete', return_value=(0, {})):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'likes': 1})
+        self.assertEqual(article.like_set.count(), 1)
+
 
 class DislikeViewTests(TestCase):
 
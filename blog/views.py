@@ -1,24 +1,33 @@
-from operator import attrgetter
+import json
 
 from django.shortcuts import get_object_or_404, reverse, redirect, render
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 from django.urls import reverse_lazy
 from django.views import generic 
 from django.contrib.auth.models import User
-from django.template.defaultfilters import slugify
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Q, F
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
 
-from .models import Article, Profile, Like, Dislike
+from . import counters, revisions, sanitizer
+from .forms import ArticleForm
+from .ratelimit import ratelimit
+from .models import Article, ArticleAutosave, ArticleSlugRedirect, AuthorStats, Profile, Like, Dislike
+from .paginators import KnownCountPaginator
 
 
+@method_decorator(ratelimit('search', when=lambda request: request.GET.get('query', '').strip()), name='dispatch')
 class ArticleListView(generic.ListView):
-    queryset = Article.published.all()
     paginate_by = 5
     context_object_name = 'articles'
 
+    def get_queryset(self):
+        # built per request, `Article.published` compares against the current time
+        return Article.published.all()
+
     def get_context_data(self, **kwargs):
         context = {}
         if self.request.GET.get('query', None):
@@ -42,20 +51,49 @@ class ArticleDetailView(generic.DetailView):
     def get_context_data(self, ** kwargs):
         context = super().get_context_data( ** kwargs)
         context['user'] = self.object.author
+        context['related_articles'] = self.object.get_related_articles()
         return context
 
     def get_queryset(self):
-        return Article.published.all()
+        return Article.published.select_related('author__profile').with_vote_counts()
+
+    def get_object(self, queryset=None):
+        article = super().get_object(queryset)
+        # buffered, the article row is updated in batches
+        counters.count_view(article.pk)
+        article.views += counters.pending_views(article.pk)
+        return article
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return super().get(request, *args, **kwargs)
+        except Http404:
+            # the article may have been renamed since the link was shared
+            moved = ArticleSlugRedirect.objects.filter(old_slug=kwargs['slug']).select_related('article').first()
+            if moved is None:
+                raise
+            return redirect(moved.article, permanent=True)
 
-class DashboardView(generic.TemplateView):
+class DashboardView(generic.ListView):
     template_name = 'blog/dashboard.html'
-    extra_context = {}
+    context_object_name = 'articles'
+    paginate_by = 10
+
+    def get_queryset(self):
+        articles = Article.objects.filter(author=self.request.user).order_by('-created', '-pk')
+        return articles.select_related('author').with_vote_counts()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # the profile is loaded along with the user by the auth backend
+        user = self.request.user
+        context['user'] = user
+        context['profile'] = user.profile
+        context['stats'] = Article.objects.author_stats(user)
+        return context
 
     @method_decorator(login_required)
     def dispatch(self, * args, ** kwargs):
-        user = self.request.user 
-        self.extra_context['user'] = user
-        self.extra_context['profile'] = user.profile
         return super().dispatch( * args, ** kwargs)
 
 
@@ -63,11 +101,10 @@ class AddArticleView(generic.CreateView):
     model = Article
     #template_name = 'blog/article_form.html'
     success_url = '/'
-    fields = ['title', 'content', 'publish']
+    form_class = ArticleForm
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        form.instance.slug = slugify(form.instance.title)
         return super().form_valid(form)
 
     @method_decorator(login_required)
@@ -89,65 +126,152 @@ class EditProfileView(generic.UpdateView):
 class UpdateArticleView(generic.UpdateView):
     model = Article
     success_url = reverse_lazy('dashboard')
-    fields = ['title', 'content', 'publish']
+    form_class = ArticleForm
+
+    def get_initial(self):
+        # pick up where an interrupted edit left off
+        initial = super().get_initial()
+        self.draft = ArticleAutosave.objects.filter(article=self.object).first()
+        if self.draft is not None:
+            initial['content'] = self.draft.content
+        return initial
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['draft'] = self.draft
+        content = self.draft.content if self.draft else revisions.normalize_newlines(self.object.content)
+        context['autosave_checksum'] = revisions.checksum(content)
+        if self.draft is None:
+            context['preview'] = self.object.content_html
+        else:
+            # the same draft is previewed on every reload until it's saved
+            context['preview'], _ = sanitizer.cached_render(content, context['autosave_checksum'])
+        return context
 
     def form_valid(self, form):
-        form.instance.slug = slugify(form.instance.title)
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        ArticleAutosave.objects.filter(article=self.object).delete()
+        return response
 
-class UserPageView(generic.TemplateView):
+
+class UserPageView(generic.ListView):
     template_name = 'blog/user_page.html'
+    context_object_name = 'user_articles'
+    paginate_by = 10
+
+    def get_queryset(self):
+        # the user, their profile and their stats rollup in one query
+        users = User.objects.select_related('profile', 'author_stats')
+        self.author = get_object_or_404(users, username=self.kwargs['username'])
+        try:
+            self.stats = self.author.author_stats
+        except AuthorStats.DoesNotExist:
+            self.stats = AuthorStats(user=self.author)
+        articles = Article.published.filter(author=self.author).order_by('-pub_date', '-pk')
+        return articles.select_related('author').with_vote_counts()
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return KnownCountPaginator(queryset, per_page, count=self.stats.articles, **kwargs)
 
     def get_context_data(self, **kwargs):
-        context = {}
-        username = kwargs['username']
-        user = get_object_or_404(User,username=username)
-        context['user'] = user
-        context['user_articles'] = Article.published.filter(author=user)
-        context['article_count'] = Article.published.filter(author=user).count()
-        context.update(kwargs)  
-        return super().get_context_data(**context)
+        context = super().get_context_data(**kwargs)
+        context['user'] = self.author
+        context['username'] = self.author.username
+        context['stats'] = self.stats
+        context['article_count'] = self.stats.articles
+        return context
+
+
+@login_required
+@require_POST
+def autosave_article(request, slug):
+    """
+    Save the draft of an article being edited. The body is JSON, either
+    `{"checksum": ..., "changes": [[start, end, text], ...]}` with the changes
+    made since the draft with that checksum, or `{"content": ...}` with the
+    whole draft. Answers with the checksum of the saved draft, or with a 409
+    and the current checksum when the changes are based on another version.
+    """
+    article = get_object_or_404(Article, slug=slug, author=request.user)
+    try:
+        data = json.loads(request.body.decode())
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Expected a JSON object.'}, status=400)
+
+    draft = ArticleAutosave.objects.filter(article=article).first()
+    base = draft.content if draft else revisions.normalize_newlines(article.content)
+    if isinstance(data.get('content'), str):
+        content = revisions.normalize_newlines(data['content'])
+    elif data.get('checksum') != revisions.checksum(base):
+        return JsonResponse({'checksum': revisions.checksum(base)}, status=409)
+    else:
+        try:
+            content = revisions.apply_changes(base, data.get('changes'))
+        except revisions.InvalidChanges as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+    if draft is None:
+        ArticleAutosave.objects.create(article=article, content=content)
+    elif content != draft.content:
+        draft.content = content
+        draft.save()
+    return JsonResponse({'checksum': revisions.checksum(content)})
+
+
+def toggle_vote(model, article, user):
+    """
+    Remove the user's vote, or add it when there was none. Both only insert
+    into the vote log, the article row isn't touched. Returns the updated
+    count, read in one statement so a concurrent `apply_votes` can't be
+    counted twice.
+    """
+    deleted, _ = model.objects.filter(user=user, article=article).delete()
+    if not deleted:
+        try:
+            with transaction.atomic():
+                model.objects.create(article=article, user=user)
+        except IntegrityError:
+            pass    # a double click, the other request added the vote
+    field = 'num_likes' if model is Like else 'num_dislikes'
+    return Article.objects.with_vote_counts().values_list(field, flat=True).get(pk=article.pk)
+
 
 @login_required
+@ratelimit('vote', key='user')
 def like_article(request, slug):
     article = get_object_or_404(Article, slug=slug)
-    user = request.user
-    likes = Like.objects.filter(user=user).filter(article=article)
-    if len(likes) > 0:
-        likes.delete() 
-        data = {
-            'likes': Like.objects.filter(article=article).count()
-        }
-        return JsonResponse(data)
-    Like.objects.create(article=article, user=user)
-    data = {
-        'likes': Like.objects.filter(article=article).count()
-    }
-    return JsonResponse(data)
+    return JsonResponse({'likes': toggle_vote(Like, article, request.user)})
+
 
 @login_required
+@ratelimit('vote', key='user')
 def dislike_article(request, slug):
     article = get_object_or_404(Article, slug=slug)
-    user = request.user
-    dislikes = Dislike.objects.filter(user=user).filter(article=article)
-    if len(dislikes) > 0:
-        dislikes.delete()
-        data = {
-            'dislikes': Dislike.objects.filter(article=article).count()
-        }
-        return JsonResponse(data)
-    Dislike.objects.create(article=article, user=user)
-    data = {
-        'dislikes': Dislike.objects.filter(article=article).count()
-    }
-    return JsonResponse(data)
+    return JsonResponse({'dislikes': toggle_vote(Dislike, article, request.user)})
 
 
 class PopularArticlesView(generic.ListView):
-    queryset = Article.published.all()
-    # popular articles should have at least a single like
-    queryset = [article for article in queryset if article.likes > 0] 
-    queryset = sorted(queryset, key=attrgetter('popularity_score'))[:10]
     context_object_name = 'articles'
     template_name = 'blog/article_list.html'
-    paginate_by = 5    # Show 5 articles per page
\ No newline at end of file
+    paginate_by = 5    # Show 5 articles per page
+
+    def get_queryset(self):
+        # popular articles should have at least a single like; ranked like
+        # `Article.popularity_score`, newest first among equal scores
+        return (
+            Article.published.with_vote_counts()
+            .filter(num_likes__gt=0)
+            .annotate(score=F('num_dislikes') - F('num_likes'))
+            .order_by('score', '-pub_date')[:10]
+        )
+
+
+class TrendingArticlesView(generic.ListView):
+    context_object_name = 'articles'
+    template_name = 'blog/article_list.html'
+    paginate_by = 5
+
+    def get_queryset(self):
+        return Article.published.with_vote_counts().trending()[:10]
@@ -1,5 +1,7 @@
 """
-Django settings for blogger project.
+Django settings for blogger project, shared by `blogger.settings.dev` and
+`blogger.settings.prod`. Deployment specific values are read from
+environment variables.
 
 Generated by 'django-admin startproject' using Django 2.1.5.
 
@@ -12,20 +14,43 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 
 import os
 
+
+def env(name, default=None):
+    return os.environ.get(name, default)
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default=0):
+    value = os.environ.get(name)
+    return default if value in (None, '') else int(value)
+
+
+def env_list(name, default=()):
+    value = os.environ.get(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
-# Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'b61c7ko6+^2^q*(r_4vp!4l#wt(e%&y*=ya%92vra(q_yf115v'
+SECRET_KEY = env('DJANGO_SECRET_KEY', 'b61c7ko6+^2^q*(r_4vp!4l#wt(e%&y*=ya%92vra(q_yf115v')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool('DJANGO_DEBUG', False)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS')
 
 
 # Application definition
@@ -41,6 +66,7 @@ INSTALLED_APPS = [
     # Third party
     'django_registration',
     'crispy_forms',
+    'ckeditor',
 
     'blog',
 ]
@@ -83,12 +109,46 @@ WSGI_APPLICATION = 'blogger.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': env('DJANGO_DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': env('DJANGO_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': env('DJANGO_DB_USER', ''),
+        'PASSWORD': env('DJANGO_DB_PASSWORD', ''),
+        'HOST': env('DJANGO_DB_HOST', ''),
+        'PORT': env('DJANGO_DB_PORT', ''),
+        # seconds a connection is kept open between requests
+        'CONN_MAX_AGE': env_int('DJANGO_DB_CONN_MAX_AGE', 0),
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': env('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('DJANGO_CACHE_LOCATION', 'blogger'),
     }
 }
 
 
+# Requests per client for the scopes of `blog.ratelimit.ratelimit`. Counters
+# live in the default cache, which should be shared by all workers.
+BLOG_RATELIMITS = {
+    'vote': env('BLOG_RATELIMIT_VOTE', '30/m'),
+    'search': env('BLOG_RATELIMIT_SEARCH', '20/m'),
+}
+
+# Seconds each worker buffers article views before writing them, see
+# `blog.counters`.
+BLOG_VIEW_FLUSH_INTERVAL = env_int('BLOG_VIEW_FLUSH_INTERVAL', 10)
+
+
+# Sessions are read on every request, serve them from the cache and only
+# fall back to the database on a miss
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -129,6 +189,7 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'blogger', 'static'),
 ]
+STATIC_ROOT = env('DJANGO_STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
 
 # Django Registration
 ACCOUNT_ACTIVATION_DAYS = 7 # One-week activation window
@@ -139,6 +200,21 @@ LOGOUT_REDIRECT_URL = '/'
 # django crispy forms
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
+# django ckeditor, offering only what blog.sanitizer keeps
+CKEDITOR_CONFIGS = {
+    'default': {
+        'toolbar': 'Article',
+        'toolbar_Article': [
+            ['Format', 'Bold', 'Italic', 'Underline', 'Strike', 'Subscript', 'Superscript'],
+            ['NumberedList', 'BulletedList', 'Blockquote', 'HorizontalRule'],
+            ['Link', 'Unlink', 'Image', 'Table'],
+            ['RemoveFormat'],
+        ],
+        'format_tags': 'p;h2;h3;h4;pre',
+        'width': '100%',
+    },
+}
+
 # Email
 EMAIL_BACKEND = (
     "django.core.mail.backends.console.EmailBackend"
@@ -0,0 +1,6 @@
+"""
+Development settings, the default for manage.py.
+"""
+from .base import *  # noqa
+
+DEBUG = env_bool('DJANGO_DEBUG', True)
@@ -0,0 +1,51 @@
+"""
+Production settings, the default for blogger/wsgi.py.
+
+DJANGO_SECRET_KEY and DJANGO_ALLOWED_HOSTS must be set, and
+DJANGO_CACHE_BACKEND and DJANGO_CACHE_LOCATION must point at a cache shared
+by all workers (e.g. memcached): sessions, cached users and rate limits
+live there.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa
+
+# DEBUG keeps every SQL query of a request in memory
+DEBUG = False
+
+if 'DJANGO_SECRET_KEY' not in os.environ:
+    raise ImproperlyConfigured('Set the DJANGO_SECRET_KEY environment variable.')
+
+# a per-process cache would let each worker keep stale users and its own
+# rate limit counters
+if 'DJANGO_CACHE_BACKEND' not in os.environ or CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+):
+    raise ImproperlyConfigured(
+        'Set the DJANGO_CACHE_BACKEND environment variable (and DJANGO_CACHE_LOCATION) '
+        'to a cache shared by all workers, such as memcached.'
+    )
+
+# reuse database connections across requests
+DATABASES['default']['CONN_MAX_AGE'] = env_int('DJANGO_DB_CONN_MAX_AGE', 600)
+
+# compile each template once per process instead of on every render
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# compress responses and answer If-None-Match / If-Modified-Since with 304s
+MIDDLEWARE = list(MIDDLEWARE)
+MIDDLEWARE[MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1:1] = [
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+]
+
+# content-hashed names plus .gz/.br variants, served from STATIC_ROOT by
+# blogger.static_server.StaticFilesMiddleware (see blogger/wsgi.py)
+STATICFILES_STORAGE = 'blogger.storage.CompressedManifestStaticFilesStorage'
@@ -15,4 +15,58 @@ $(document).ready(function() {
 			$('#article-dislikes').text(data.dislikes);
 		});
 	});
+	// autosave the article being edited, sending only the changed range
+	let autosaveForm = $('form[data-autosave-url]');
+	if (autosaveForm.length) {
+		let content = autosaveForm.find('[name=content]');
+		let checksum = autosaveForm.attr('data-autosave-checksum');
+		// CKEditor only copies its content into the textarea on submit
+		let contentValue = function() {
+			let editor = window.CKEDITOR && CKEDITOR.instances[content.attr('id')];
+			return editor ? editor.getData() : content.val();
+		};
+		// code points, which is what the server's offsets count
+		let saved = Array.from(content.val());
+		let pending = false;
+
+		let changedRange = function(before, after) {
+			let start = 0;
+			while (start < before.length && start < after.length && before[start] === after[start]) {
+				start++;
+			}
+			let end = 0;
+			while (end < before.length - start && end < after.length - start &&
+					before[before.length - 1 - end] === after[after.length - 1 - end]) {
+				end++;
+			}
+			return [start, before.length - end, after.slice(start, after.length - end).join('')];
+		};
+
+		setInterval(function() {
+			let current = Array.from(contentValue());
+			if (pending || current.join('') === saved.join('')) {
+				return;
+			}
+			pending = true;
+			let body = checksum ? {checksum: checksum, changes: [changedRange(saved, current)]}
+				: {content: current.join('')};
+			$.ajax({
+				url: autosaveForm.attr('data-autosave-url'),
+				method: 'POST',
+				contentType: 'application/json',
+				data: JSON.stringify(body),
+				headers: {'X-CSRFToken': autosaveForm.find('[name=csrfmiddlewaretoken]').val()}
+			}).done(function(data) {
+				checksum = data.checksum;
+				saved = current;
+			}).fail(function(xhr) {
+				// the server has another version: send the whole draft next time
+				if (xhr.status === 409) {
+					checksum = null;
+				}
+			}).always(function() {
+				pending = false;
+			});
+		}, 5000);
+	}
 });
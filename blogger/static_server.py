@@ -0,0 +1,134 @@
+"""
+WSGI middleware serving the collected static files, so production doesn't
+need a separate web server for them.
+
+Files are indexed once at startup. Names listed in the staticfiles manifest
+carry a content hash and are cached for a year; anything else must be
+revalidated. Precompressed `.br` / `.gz` variants written by
+`blogger.storage.CompressedManifestStaticFilesStorage` are served to
+clients that accept them.
+"""
+import json
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from wsgiref.headers import Headers
+
+FOREVER = 60 * 60 * 24 * 365
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticFile:
+    def __init__(self, path, immutable, max_age):
+        # encoding -> (path, size)
+        self.variants = {None: (path, os.path.getsize(path))}
+        for encoding, extension in ENCODINGS:
+            if os.path.isfile(path + extension):
+                self.variants[encoding] = (path + extension, os.path.getsize(path + extension))
+        stat = os.stat(path)
+        self.mtime = int(stat.st_mtime)
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.etag = f'"{self.mtime:x}-{stat.st_size:x}"'
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type.endswith('javascript'):
+            self.content_type += '; charset=utf-8'
+        if immutable:
+            self.cache_control = f'public, max-age={FOREVER}, immutable'
+        else:
+            self.cache_control = f'public, max-age={max_age}'
+
+    def choose(self, accept_encoding):
+        accepted = set()
+        for token in accept_encoding.split(','):
+            encoding, _, params = token.partition(';')
+            quality = params.strip()
+            if quality.startswith('q='):
+                try:
+                    if float(quality[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(encoding.strip())
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and encoding in accepted:
+                return encoding, self.variants[encoding]
+        return None, self.variants[None]
+
+    def not_modified(self, environ, etag):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since:
+            try:
+                return int(parsedate_to_datetime(if_modified_since).timestamp()) >= self.mtime
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class StaticFilesMiddleware:
+    def __init__(self, application, root, prefix, max_age=60):
+        self.application = application
+        self.prefix = '/' + prefix.strip('/') + '/'
+        self.files = self.index(root, max_age) if root and os.path.isdir(root) else {}
+
+    def index(self, root, max_age):
+        hashed = set()
+        manifest = os.path.join(root, 'staticfiles.json')
+        if os.path.isfile(manifest):
+            with open(manifest) as f:
+                hashed.update(json.load(f).get('paths', {}).values())
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(('.br', '.gz')) and name[:-3] in names:
+                    continue
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                if relative == 'staticfiles.json':
+                    continue
+                files[self.prefix + relative] = StaticFile(path, relative in hashed, max_age)
+        return files
+
+    def __call__(self, environ, start_response):
+        static_file = self.files.get(environ.get('PATH_INFO', ''))
+        if static_file is None:
+            return self.application(environ, start_response)
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed', [('Allow', 'GET, HEAD')])
+            return []
+
+        encoding, (path, size) = static_file.choose(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        etag = static_file.etag if encoding is None else f'{static_file.etag[:-1]}-{encoding}"'
+        headers = Headers([
+            ('Cache-Control', static_file.cache_control),
+            ('ETag', etag),
+            ('Last-Modified', static_file.last_modified),
+        ])
+        if len(static_file.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if static_file.not_modified(environ, etag):
+            start_response('304 Not Modified', headers.items())
+            return []
+
+        headers['Content-Type'] = static_file.content_type
+        headers['Content-Length'] = str(size)
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        start_response('200 OK', headers.items())
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        f = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(f)
+        return read_chunks(f)
+
+
+def read_chunks(f, size=64 * 1024):
+    with f:
+        chunk = f.read(size)
+        while chunk:
+            yield chunk
+            chunk = f.read(size)
@@ -0,0 +1,64 @@
+import gzip
+import io
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def gzip_compress(data):
+    # a fixed mtime keeps the output identical across collectstatic runs
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def compressors():
+    yield 'gz', gzip_compress
+    if brotli is not None:
+        yield 'br', brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage (content-hashed file names, safe to cache forever) that
+    also writes `.gz` and, when the `brotli` package is installed, `.br`
+    variants of text assets at collectstatic time, for
+    `blogger.static_server.StaticFilesMiddleware` to serve.
+    """
+    compressible_extensions = ('.css', '.js', '.map', '.svg', '.txt', '.html', '.json', '.xml', '.ttf', '.eot')
+    min_size = 256
+    # a variant that saves less than this isn't worth serving
+    max_ratio = 0.95
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(set(paths) | hashed_names):
+            if name.endswith(self.compressible_extensions):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        for extension, compress in compressors():
+            variant = f'{path}.{extension}'
+            compressed = compress(data) if len(data) >= self.min_size else None
+            if compressed is None or len(compressed) > len(data) * self.max_ratio:
+                # drop a variant left over from a previous collectstatic
+                if os.path.exists(variant):
+                    os.remove(variant)
+                continue
+            with open(variant, 'wb') as f:
+                f.write(compressed)
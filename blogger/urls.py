@@ -17,10 +17,18 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from django_registration.backends.activation.views import RegistrationView
+from django_registration.forms import RegistrationFormUniqueEmail
 
 urlpatterns = [
     path('', include('blog.urls')),
     path('admin/', admin.site.urls),
+    # one account per e-mail address, it's what users log in with
+    path(
+        'accounts/register/',
+        RegistrationView.as_view(form_class=RegistrationFormUniqueEmail),
+        name='django_registration_register',
+    ),
     path('accounts/', include('django_registration.backends.activation.urls')),
     path('accounts/', include('django.contrib.auth.urls')),
 
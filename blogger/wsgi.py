@@ -7,10 +7,22 @@ For more information on this file, see
 https://docs.djangoproject.com/en/2.1/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
+from django.conf import settings
+from django.core.checks import run_checks
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogger.settings')
+from blogger.static_server import StaticFilesMiddleware
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogger.settings.prod')
 
 application = get_wsgi_application()
+
+logger = logging.getLogger(__name__)
+for warning in run_checks(tags=['performance'], include_deployment_checks=True):
+    logger.warning('%s', warning)
+
+# serve `collectstatic` output without a separate web server
+application = StaticFilesMiddleware(application, settings.STATIC_ROOT, settings.STATIC_URL)